@@ -0,0 +1,189 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+Declarative conditions evaluated in the browser.
+A BrowserCondition is callable, so it can be used as the condition of a trait. All the browser conditions of an
+ElementWithTraits are evaluated together, with one script call per evaluation of its traits. They can also be waited
+for without polling from Python: see Wait.until_browser_conditions().
+"""
+from pages.javascript import is_translatable, with_find_elements
+
+
+# Defines pagesConditionHolds(condition), which evaluates a condition specification in the browser.
+CONDITIONS = with_find_elements("""
+var pagesConditionHolds = function (condition) {
+    var elements = pagesFindElements(condition.by, condition.value, document);
+    var isVisible = function (element) {
+        var style = window.getComputedStyle(element);
+        return style.visibility !== 'hidden' && style.display !== 'none' &&
+            (element.offsetWidth > 0 || element.offsetHeight > 0 || element.getClientRects().length > 0);
+    };
+    switch (condition.type) {
+        case 'present':
+            return elements.length > 0;
+        case 'visible':
+            return elements.length > 0 && isVisible(elements[0]);
+        case 'enabled':
+            return elements.length > 0 && !elements[0].disabled;
+        case 'text_matches':
+            return elements.length > 0 && new RegExp(condition.pattern).test(pagesElementText(elements[0]));
+        case 'text_equals':
+            return elements.length > 0 && pagesElementText(elements[0]) === condition.text;
+        case 'attribute_equals':
+            return elements.length > 0 && elements[0].getAttribute(condition.attribute) === condition.attribute_value;
+        case 'count_at_least':
+            return elements.length >= condition.count;
+        case 'child_count_at_least':
+            return elements.length > 0 && elements[0].children.length >= condition.count;
+    }
+    throw new Error('unknown condition type: ' + condition.type);
+};
+var pagesFailingConditions = function (conditions) {
+    var failing = [];
+    for (var c = 0; c < conditions.length; c++) {
+        try {
+            if (!pagesConditionHolds(conditions[c])) {
+                failing.push(c);
+            }
+        } catch (e) {
+            failing.push(c);
+        }
+    }
+    return failing;
+};
+""")
+
+FAILING_CONDITIONS_SCRIPT = CONDITIONS + "return pagesFailingConditions(arguments[0]);"
+
+# Resolves with the indexes of the conditions still failing, as soon as all of them hold or after the timeout.
+# Conditions are checked again on every DOM mutation (at most once per animation frame) and every 100 ms, to catch
+# changes which do not mutate the DOM, such as style changes due to loaded stylesheets.
+WAIT_FOR_CONDITIONS_SCRIPT = CONDITIONS + """
+var conditions = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+var failing = pagesFailingConditions(conditions);
+if (failing.length === 0) {
+    done(failing);
+    return;
+}
+var finished = false, scheduled = false, observer, interval, timer;
+var finish = function () {
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    done(failing);
+};
+var check = function () {
+    scheduled = false;
+    if (!finished) {
+        failing = pagesFailingConditions(conditions);
+        if (failing.length === 0) {
+            finish();
+        }
+    }
+};
+var schedule = function () {
+    if (!scheduled) {
+        scheduled = true;
+        (window.requestAnimationFrame || setTimeout)(check);
+    }
+};
+observer = new MutationObserver(schedule);
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+interval = setInterval(check, 100);
+timer = setTimeout(function () {
+    failing = pagesFailingConditions(conditions);
+    finish();
+}, timeout * 1000);
+"""
+
+
+class BrowserCondition(object):
+    """
+    Condition evaluated by the browser from a declarative specification.
+    Calling it evaluates the condition with one execute_script call.
+    """
+
+    def __init__(self, driver, specification):
+        """
+        :param driver: the WebDriver running the browser.
+        :param specification: dictionary with the type of the condition and its parameters, understood by
+        pagesConditionHolds.
+        """
+        self.driver = driver
+        self.specification = specification
+
+    def __call__(self):
+        return len(failing_conditions(self.driver, [self])) == 0
+
+    def __str__(self):
+        return "browser condition " + str(self.specification)
+
+
+def element_present(driver, locator):
+    return BrowserCondition(driver, _specification('present', locator))
+
+
+def element_visible(driver, locator):
+    return BrowserCondition(driver, _specification('visible', locator))
+
+
+def element_enabled(driver, locator):
+    return BrowserCondition(driver, _specification('enabled', locator))
+
+
+def text_equals(driver, locator, text):
+    return BrowserCondition(driver, _specification('text_equals', locator, text=text))
+
+
+def attribute_equals(driver, locator, attribute, value):
+    return BrowserCondition(driver, _specification('attribute_equals', locator, attribute=attribute,
+                                                   attribute_value=value))
+
+
+def text_matches(driver, locator, pattern):
+    """
+    :param pattern: JavaScript regular expression the text of the element should match.
+    """
+    return BrowserCondition(driver, _specification('text_matches', locator, pattern=pattern))
+
+
+def count_at_least(driver, locator, count):
+    return BrowserCondition(driver, _specification('count_at_least', locator, count=count))
+
+
+def child_count_at_least(driver, locator, count):
+    return BrowserCondition(driver, _specification('child_count_at_least', locator, count=count))
+
+
+def failing_conditions(driver, conditions):
+    """
+    Evaluates all conditions with a single script call and returns the list of those which are not true.
+    """
+    failing = driver.execute_script(FAILING_CONDITIONS_SCRIPT, [condition.specification for condition in conditions])
+    return [conditions[index] for index in failing]
+
+
+def is_browser_condition(condition):
+    return isinstance(condition, BrowserCondition)
+
+
+def _specification(condition_type, locator, **parameters):
+    if not is_translatable(locator):
+        raise ValueError("locator {0} cannot be evaluated in the browser".format(locator))
+    specification = {'type': condition_type, 'by': locator[0], 'value': locator[1]}
+    specification.update(parameters)
+    return specification
@@ -14,46 +14,185 @@
 # limitations under the License.                                           #
 ############################################################################
 
-from selenium.common.exceptions import StaleElementReferenceException
+import logging
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException, WebDriverException, \
+    NoSuchElementException
+
+from pages.browser_conditions import is_browser_condition, failing_conditions
 from pages.exceptions import IllegalStateException
-from pages.traits import Trait
+from pages.profiles import get_load_profiles
+from pages.timeline import span
+from pages.traits import Trait, TraitStatistics
+from pages.wait.deadline import deadline_bound
+from pages.wait.metrics import current_metrics
 from pages.wait.wait import Wait
 
 
 DEFAULT_POLLING_TIME = 0.5
 DEFAULT_TIMEOUT = 25
 
+logger = logging.getLogger(__name__)
+
+_thread_pools = {}
+_thread_pools_lock = threading.Lock()
+_pool_threads = threading.local()
+
 
 class ElementWithTraits(object):
     """
     Base class which defines a mechanism to address timing issues on waiting for loading of elements in a tests.
     A trait is a condition that must be verified for the element to be ready.
     """
+    _trait_statistics = {}  # class -> TraitStatistics, shared by all instances of the class
+
     def __init__(self, name):
         self.name = name
         self.traits = []
+        self.failure_traits = []
         self.timeout = DEFAULT_TIMEOUT
         self.polling_time = DEFAULT_POLLING_TIME
         self.traits_eager_evaluation = False
+        self.traits_event_driven = False
+        self.parallel_workers = None
+        self.adaptive_trait_order = False
+        self._satisfied_traits = None  # trait -> poll it was last true on, while waiting for sticky traits
+        self._polls = 0
+
+    def add_trait(self, condition, description, sticky=False, time_limit=None):
+        """
+        :param sticky: True if the trait cannot regress once true, e.g. 'header rendered'. While waiting until
+        loaded, a sticky trait is not evaluated again once it has been true.
+        :param time_limit: optional seconds within which the condition must return. A condition which does not, e.g.
+        on a hung browser, is not true for that evaluation and is logged as slow. See Trait.evaluate().
+        """
+        self.traits.append(Trait(condition, description, sticky, time_limit))
+        return self
 
-    def add_trait(self, condition, description):
-        self.traits.append(Trait(condition, description))
+    def add_failure_trait(self, condition, description):
+        """
+        Adds a condition which shows that the element failed to load, e.g. 'error banner displayed', 'redirected to
+        login'. While traits are not present, wait_until_loaded() raises a FailureTraitException as soon as any failure
+        trait is true, instead of waiting until timeout.
+        """
+        self.failure_traits.append(Trait(condition, description))
         return self
 
+    def detect_failure_traits(self):
+        """
+        Evaluates all failure traits and returns the description of those which are true.
+        A failure trait whose element is not found, or is stale, is not true.
+        """
+        detected = []
+        for trait in self.failure_traits:
+            try:
+                if trait.condition():
+                    detected.append(trait.description)
+            except (NoSuchElementException, StaleElementReferenceException):
+                pass
+        return detected
+
     def with_eager_evaluation(self):
         self.traits_eager_evaluation = True
 
-    def wait_until_loaded(self, timeout=DEFAULT_TIMEOUT, polling_time=DEFAULT_POLLING_TIME):
+    def with_event_driven_wait(self):
+        """
+        Traits whose condition is a BrowserCondition (see pages.browser_conditions) are waited for in the browser,
+        which notifies as soon as they are all true, instead of being polled. Other traits are polled afterwards.
+        Traits of elements with failure traits are always polled, so that failures are detected.
+        The script timeout of the driver is changed while waiting in the browser, then restored. Older versions of
+        Selenium than 4 cannot tell the script timeout of a driver, so browser conditions are polled with them.
+        """
+        self.traits_event_driven = True
+        return self
+
+    def with_parallel_evaluation(self, max_workers=4):
+        """
+        Traits are evaluated concurrently, on a pool of max_workers threads sharing the driver, so that evaluating
+        all traits takes as long as the slowest one. Lazy and eager evaluation return the same results as sequential
+        evaluation, but in lazy mode all traits are evaluated.
+        Traits are evaluated sequentially when the driver keeps its connection alive, as RemoteConnection then sends
+        all commands through a single HTTP connection which threads cannot share, and when the element is evaluated
+        by a trait already running on a pool thread, so that nested evaluations do not wait for their own pool.
+        """
+        self.parallel_workers = max_workers
+        return self
+
+    def with_adaptive_trait_order(self):
+        """
+        Evaluation time and failure rate of traits are recorded for the class of the element. In lazy evaluation,
+        traits most likely to fail and cheapest to evaluate are then evaluated first, by later polls and by later
+        instances of the same class. See learned_trait_order().
+        """
+        self.adaptive_trait_order = True
+        return self
+
+    def learned_trait_order(self):
+        """
+        Returns the descriptions of traits in the order they are evaluated with adaptive trait order.
+        """
+        return [trait.description for trait in self.get_trait_statistics().order(self.traits)]
+
+    def get_trait_statistics(self):
+        """
+        Returns the TraitStatistics recorded for the class of the element.
+        """
+        return ElementWithTraits._trait_statistics.setdefault(type(self), TraitStatistics())
+
+    def wait_until_loaded(self, timeout=DEFAULT_TIMEOUT, polling_time=DEFAULT_POLLING_TIME, poll_strategy=None,
+                          cancellation_token=None):
+        """
+        Waits until all traits are present.
+        When load profiles are enabled (see pages.profiles) and enough loads of the class of the element have been
+        recorded, the polling time is derived from them, and loads exceeding their soft timeout are logged.
+        :param poll_strategy: optional PollStrategy (see pages.wait.poll_strategies) used instead of polling_time.
+        :param cancellation_token: optional threading.Event stopping the wait with a WaitCancelledException when set.
+        """
+        load_profiles = get_load_profiles()
+        if load_profiles is not None:
+            timeout, polling_time = load_profiles.timing(self, timeout, polling_time)
         self.timeout = timeout
         self.polling_time = polling_time
-        wait = Wait(self.timeout, self.polling_time)\
-            .with_ignored_exceptions(StaleElementReferenceException)
+        wait = Wait(self.timeout, self.polling_time, poll_strategy=poll_strategy)\
+            .with_ignored_exceptions(StaleElementReferenceException).with_cancellation(cancellation_token)
         if len(self.traits) == 0:
             raise IllegalStateException("Element '{0}' has no traits".format(self.name))
-        else:
-            wait.until_traits_are_present(self)
+        if self.traits_event_driven and len(self.failure_traits) == 0 and self._wait_for_browser_traits(wait):
             return self
+        if any(trait.sticky for trait in self.traits):
+            self._satisfied_traits = {}
+            self._polls = 0
+        try:
+            with span(self.name + '.wait_until_loaded', 'wait'):
+                wait.until_traits_are_present(self)
+        finally:
+            self._satisfied_traits = None
+        return self
+
+    def _wait_for_browser_traits(self, wait):
+        """
+        Waits in the browser for traits built on browser conditions and leaves the remaining time to the wait.
+        Returns True if all traits have been waited for.
+        """
+        browser_traits = [trait for trait in self.traits if is_browser_condition(trait.condition)]
+        if len(browser_traits) == 0:
+            return False
+        start_time = time.time()
+        try:
+            wait.until_browser_conditions([trait.condition for trait in browser_traits],
+                                          [trait.description for trait in browser_traits])
+        except TimeoutException:
+            raise
+        except WebDriverException as ex:
+            logger.debug("Waiting in the browser failed, traits will be polled: {0}".format(str(ex)))
+            return False
+        if len(browser_traits) == len(self.traits):
+            return True
+        wait.with_timeout(max(0, self.timeout - (time.time() - start_time)))
+        return False
 
     def has_all_traits(self):
         return len(self.evaluate_traits()) == 0
@@ -63,12 +202,142 @@ class ElementWithTraits(object):
         Evaluates traits and returns a list containing the description of traits which are not true.
         Notice that if LAZY_EVALUATION is set to False all traits are evaluated before returning. Use this option
         only for debugging purposes.
+        Traits built on browser conditions are all evaluated with one script call, when the first of them is met.
+        While waiting until loaded an element with sticky traits, traits which have been true are not evaluated
+        again: see _evaluate_unsatisfied_traits().
+        """
+        if self._satisfied_traits is not None:
+            return self._evaluate_unsatisfied_traits()
+        return self._missing_traits(self.traits)
+
+    def _evaluate_unsatisfied_traits(self):
         """
+        Evaluates only traits which have not been true yet during the current wait.
+        Once all traits have been true, those which are not sticky and were true on an earlier poll are evaluated
+        again in a confirmation pass, as they may have regressed.
+        """
+        self._polls += 1
+        missing_traits = self._missing_traits([trait for trait in self.traits if trait not in self._satisfied_traits])
+        if len(missing_traits) > 0:
+            return missing_traits
+        traits_to_confirm = [trait for trait in self.traits
+                             if not trait.sticky and self._satisfied_traits[trait] < self._polls]
+        for trait in traits_to_confirm:
+            del self._satisfied_traits[trait]
+        return self._missing_traits(traits_to_confirm)
+
+    def _missing_traits(self, traits):
         return_value = []
-        for trait in self.traits:
-            if not trait.condition():
+        metrics = current_metrics()
+        for trait, is_true in self._trait_results(traits):
+            if is_true and metrics is not None:
+                metrics.trait_true(trait.description)
+            if is_true and self._satisfied_traits is not None:
+                self._satisfied_traits[trait] = self._polls
+            elif not is_true:
                 if not self.traits_eager_evaluation:
                     return [trait.description]
                 else:
                     return_value.append(trait.description)
         return return_value
+
+    def _trait_results(self, traits):
+        """
+        Yields each trait, in order, with the result of its evaluation.
+        """
+        if self._evaluates_in_parallel():
+            for trait_result in self._evaluate_traits_in_parallel(traits):
+                yield trait_result
+            return
+        statistics = None
+        if self.adaptive_trait_order:
+            statistics = self.get_trait_statistics()
+            if not self.traits_eager_evaluation:
+                traits = statistics.order(traits)
+        failing_browser_conditions = None
+        for trait in traits:
+            start_time = time.time()
+            try:
+                if is_browser_condition(trait.condition):
+                    if failing_browser_conditions is None:
+                        failing_browser_conditions = self._failing_browser_conditions(traits)
+                    is_true = trait.condition not in failing_browser_conditions
+                else:
+                    is_true = trait.evaluate()
+                    if trait.exceeded_time_limit:
+                        self._record_slow_trait(trait)
+            except Exception:
+                if statistics is not None:
+                    statistics.record(trait.description, time.time() - start_time, False)
+                raise
+            if statistics is not None:
+                statistics.record(trait.description, time.time() - start_time, is_true)
+            yield trait, is_true
+
+    def _evaluates_in_parallel(self):
+        if self.parallel_workers is None or getattr(_pool_threads, 'active', False):
+            return False
+        command_executor = getattr(getattr(self, 'driver', None), 'command_executor', None)
+        return not getattr(command_executor, 'keep_alive', False)
+
+    def _evaluate_traits_in_parallel(self, traits):
+        """
+        Evaluates traits on the thread pool, browser conditions being a single task. Tasks run within the current
+        deadline, so that waits started by traits do not outlive it.
+        Exceptions are raised in trait order, when the trait which raised is met.
+        """
+        python_traits = [trait for trait in traits if not is_browser_condition(trait.condition)]
+        tasks = [trait.evaluate for trait in python_traits]
+        if len(python_traits) < len(traits):
+            tasks.append(lambda: self._failing_browser_conditions(traits))
+        tasks = [deadline_bound(task) for task in tasks]
+        outcomes = _thread_pool(self.parallel_workers).map(_call_capturing_exception, tasks)
+        python_outcomes = dict(zip(python_traits, outcomes))
+        for trait in traits:
+            if is_browser_condition(trait.condition):
+                value, exception = outcomes[-1]
+                is_true = exception is None and trait.condition not in value
+            else:
+                value, exception = python_outcomes[trait]
+                is_true = value
+                if trait.exceeded_time_limit:
+                    self._record_slow_trait(trait)
+            if exception is not None:
+                raise exception
+            yield trait, is_true
+
+    def _record_slow_trait(self, trait):
+        logger.warning("Trait <{0}> of {1} did not return within {2} seconds".format(
+            trait.description, self.name, str(trait.time_limit)))
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.trait_slow(trait.description)
+
+    def _failing_browser_conditions(self, traits):
+        with span('browser conditions', 'trait'):
+            return self._evaluate_browser_conditions(traits)
+
+    def _evaluate_browser_conditions(self, traits):
+        conditions_by_driver = {}
+        for trait in traits:
+            if is_browser_condition(trait.condition):
+                conditions_by_driver.setdefault(trait.condition.driver, []).append(trait.condition)
+        failing = []
+        for driver, conditions in conditions_by_driver.items():
+            failing.extend(failing_conditions(driver, conditions))
+        return failing
+
+
+def _thread_pool(workers):
+    with _thread_pools_lock:
+        if workers not in _thread_pools:
+            _thread_pools[workers] = ThreadPool(workers)
+        return _thread_pools[workers]
+
+
+def _call_capturing_exception(task):
+    _pool_threads.active = True
+    try:
+        return task(), None
+    except Exception as ex:
+        return None, ex
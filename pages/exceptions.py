@@ -20,6 +20,21 @@ class IllegalStateException(RuntimeError):
         super(IllegalStateException, self).__init__(*args, **kwargs)
 
 
+class FailureTraitException(RuntimeError):
+    def __init__(self, *args, **kwargs):
+        super(FailureTraitException, self).__init__(*args, **kwargs)
+
+
+class WaitCancelledException(RuntimeError):
+    def __init__(self, *args, **kwargs):
+        super(WaitCancelledException, self).__init__(*args, **kwargs)
+
+
+class CommandBudgetExceededException(RuntimeError):
+    def __init__(self, *args, **kwargs):
+        super(CommandBudgetExceededException, self).__init__(*args, **kwargs)
+
+
 class WebDriverCreationException(RuntimeError):
     def __init__(self, *args, **kwargs):
         super(WebDriverCreationException, self).__init__(*args, **kwargs)  # pragma: no cover
@@ -0,0 +1,349 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+Tracing of the commands sent to WebDriver, attributed to the pages and components sending them.
+"""
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+
+from selenium.webdriver.remote.webelement import WebElement
+
+from pages.element_with_traits import ElementWithTraits
+from pages.exceptions import CommandBudgetExceededException
+from pages.page import Page
+
+UNATTRIBUTED = '<test code>'
+MAX_LISTED_COMMANDS = 50
+
+logger = logging.getLogger(__name__)
+
+_budgets = threading.local()
+
+
+class CommandRecord(object):
+    """
+    A command sent to WebDriver.
+    component and method are those of the innermost page or component method on the stack when the command was sent,
+    page_method the outermost page method, UNATTRIBUTED if the command is sent by test code.
+    """
+    __slots__ = ('command', 'component', 'method', 'page_method', 'start_time', 'latency', 'request_size',
+                 'response_size', 'error')
+
+    def __init__(self, command, component, method, page_method, start_time):
+        self.command = command
+        self.component = component
+        self.method = method
+        self.page_method = page_method
+        self.start_time = start_time
+        self.latency = 0
+        self.request_size = 0
+        self.response_size = 0
+        self.error = None
+
+    @property
+    def caller(self):
+        return self.component + '.' + self.method if self.component != UNATTRIBUTED else UNATTRIBUTED
+
+    def __str__(self):
+        return "{0} by {1} ({2:.1f} ms)".format(self.command, self.caller, self.latency * 1000)
+
+
+class TracingDriver(object):
+    """
+    Traces every command sent through the driver, which is instrumented in place: pages, components, tables and
+    waits keep using the driver as usual. Use trace(driver) to get the TracingDriver of a driver.
+    Listeners are called with each CommandRecord once the command has returned. Records are kept only if the driver
+    is traced with trace(): command budgets and timeline recorders trace it while they are active, without keeping
+    records.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.records = []
+        self.keep_records = False
+        self._users = 0  # active budgets and recorders, see _acquire_tracing()
+        self._budgets = []  # active budgets given this driver, counting its commands from any thread
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._execute = driver.execute
+        driver.execute = self._traced_execute
+        driver._pages_tracing_driver = self
+
+    def stop(self):
+        """
+        Restores the driver.
+        """
+        if getattr(self.driver, '_pages_tracing_driver', None) is not self:
+            return
+        del self.driver.execute
+        del self.driver._pages_tracing_driver
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener):
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def round_trips_by_page_method(self):
+        """
+        Returns a dictionary of page method -> number of commands sent while it ran.
+        """
+        round_trips = {}
+        for record in self.records:
+            round_trips[record.page_method] = round_trips.get(record.page_method, 0) + 1
+        return round_trips
+
+    def top_offenders(self, limit=10):
+        """
+        Returns the component methods sending most commands, as tuples of (component.method, number of commands,
+        total latency, total payload size), most commands first.
+        """
+        offenders = {}
+        for record in self.records:
+            totals = offenders.setdefault(record.caller, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += record.latency
+            totals[2] += record.request_size + record.response_size
+        return sorted([(caller, count, latency, size) for caller, (count, latency, size) in offenders.items()],
+                      key=lambda offender: (-offender[1], -offender[2]))[:limit]
+
+    def report(self, limit=10):
+        """
+        Returns a text report of round-trips per page method and of the top offenders.
+        """
+        lines = ["{0} commands in {1:.3f} seconds".format(len(self.records),
+                                                          sum(record.latency for record in self.records)),
+                 "", "Round-trips per page method:"]
+        for page_method, count in sorted(self.round_trips_by_page_method().items(), key=lambda item: -item[1]):
+            lines.append("  {0:>6}  {1}".format(count, page_method))
+        lines.extend(["", "Top offenders:"])
+        for caller, count, latency, size in self.top_offenders(limit):
+            lines.append("  {0:>6}  {1:>10.1f} ms  {2:>10} bytes  {3}".format(count, latency * 1000, size, caller))
+        return '\n'.join(lines)
+
+    def _traced_execute(self, driver_command, params=None):
+        component, method, page_method = _attribution(sys._getframe(1))
+        record = CommandRecord(driver_command, component, method, page_method, time.time())
+        record.request_size = _payload_size(params)
+        try:
+            response = self._execute(driver_command, params)
+            record.response_size = _payload_size(response.get('value') if response else None)
+            return response
+        except Exception as ex:
+            record.error = ex.__class__.__name__
+            raise
+        finally:
+            record.latency = time.time() - record.start_time
+            with self._lock:
+                if self.keep_records:
+                    self.records.append(record)
+                listeners = list(self._listeners)
+                budgets = list(self._budgets)
+            for listener in listeners:
+                listener(record)
+            budgets.extend(budget for budget in getattr(_budgets, 'stack', []) if budget not in budgets)
+            for budget in budgets:
+                budget.records.append(record)
+
+
+class CommandBudget(object):
+    """
+    Budget of WebDriver commands and seconds for a block of code or a method. See command_budget().
+    """
+
+    def __init__(self, max_commands=None, max_seconds=None, warn=False, driver=None, name=None):
+        self.max_commands = max_commands
+        self.max_seconds = max_seconds
+        self.warn = warn
+        self.driver = driver
+        self.name = name
+        self.records = []
+        self.elapsed = 0
+        self._start_time = None
+        self._tracing_driver = None
+
+    def __enter__(self):
+        self.records = []
+        if self.driver is not None:
+            self._tracing_driver = _acquire_tracing(self.driver)
+            with self._tracing_driver._lock:
+                self._tracing_driver._budgets.append(self)
+        if getattr(_budgets, 'stack', None) is None:
+            _budgets.stack = []
+        _budgets.stack.append(self)
+        self._start_time = time.time()
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.elapsed = time.time() - self._start_time
+        _budgets.stack.remove(self)
+        if self._tracing_driver is not None:
+            with self._tracing_driver._lock:
+                self._tracing_driver._budgets.remove(self)
+            _release_tracing(self._tracing_driver)
+            self._tracing_driver = None
+        if exception_type is None:
+            self.check()
+
+    def __call__(self, function):
+        """
+        Decorates a function or method so that each call has the budget. The driver of the page or component a
+        method belongs to is traced.
+        """
+        @functools.wraps(function)
+        def with_budget(*args, **kwargs):
+            driver = self.driver
+            if driver is None and len(args) > 0:
+                driver = getattr(args[0], 'driver', None)
+            name = self.name if self.name is not None else function.__name__
+            with CommandBudget(self.max_commands, self.max_seconds, self.warn, driver, name):
+                return function(*args, **kwargs)
+        return with_budget
+
+    def exceeded(self):
+        """
+        Returns the descriptions of the limits exceeded, an empty list if the budget is kept.
+        """
+        exceeded = []
+        if self.max_commands is not None and len(self.records) > self.max_commands:
+            exceeded.append("{0} commands (budget {1})".format(len(self.records), self.max_commands))
+        if self.max_seconds is not None and self.elapsed > self.max_seconds:
+            exceeded.append("{0:.3f} seconds (budget {1})".format(self.elapsed, self.max_seconds))
+        return exceeded
+
+    def check(self):
+        """
+        Raises a CommandBudgetExceededException listing the commands sent, or logs a warning if warn is set, when the
+        budget is exceeded.
+        """
+        exceeded = self.exceeded()
+        if len(exceeded) == 0:
+            return
+        lines = ["{0} exceeded its budget: {1}".format(self.name or 'block', ', '.join(exceeded))]
+        lines.extend("  " + str(record) for record in self.records[:MAX_LISTED_COMMANDS])
+        if len(self.records) > MAX_LISTED_COMMANDS:
+            lines.append("  ... {0} more".format(len(self.records) - MAX_LISTED_COMMANDS))
+        message = '\n'.join(lines)
+        if self.warn:
+            logger.warning(message)
+        else:
+            raise CommandBudgetExceededException(message)
+
+
+def command_budget(max_commands=None, max_seconds=None, warn=False, driver=None, name=None):
+    """
+    Limits the number of WebDriver commands, and the seconds, a block or a method takes. Usable as context manager:
+
+        with command_budget(max_commands=5, max_seconds=1.0, driver=driver):
+            search_page.search('London')
+
+    or as decorator of page or component methods:
+
+        @command_budget(max_commands=5)
+        def search(self, text):
+
+    When the budget is exceeded, raises a CommandBudgetExceededException listing the commands sent, or logs a
+    warning if warn is True. The driver given, or the one of the page or component of a decorated method, is traced
+    while the block runs, and its commands are counted whichever thread sends them, e.g. those of time-limited or
+    parallel traits. Commands of other traced drivers (see trace()) are counted when sent from the thread running the
+    block.
+    """
+    return CommandBudget(max_commands, max_seconds, warn, driver, name)
+
+
+def trace(driver):
+    """
+    Returns the TracingDriver instrumenting driver, instrumenting it if it is not yet. The commands sent are recorded
+    until the TracingDriver is stopped.
+    """
+    tracing_driver = _tracing_driver(driver)
+    tracing_driver.keep_records = True
+    return tracing_driver
+
+
+def _tracing_driver(driver):
+    tracing_driver = getattr(driver, '_pages_tracing_driver', None)
+    if tracing_driver is None:
+        tracing_driver = TracingDriver(driver)
+    return tracing_driver
+
+
+def _acquire_tracing(driver):
+    """
+    Traces driver for a budget or a recorder, until released. Returns its TracingDriver.
+    """
+    tracing_driver = _tracing_driver(driver)
+    with tracing_driver._lock:
+        tracing_driver._users += 1
+    return tracing_driver
+
+
+def _release_tracing(tracing_driver):
+    """
+    Restores the driver once no budget or recorder uses it, unless it is traced with trace().
+    """
+    with tracing_driver._lock:
+        tracing_driver._users -= 1
+        unused = tracing_driver._users == 0 and not tracing_driver.keep_records
+    if unused:
+        tracing_driver.stop()
+
+
+def _attribution(frame):
+    """
+    Walks the stack from frame outwards and returns the names of the innermost component and of its method, and the
+    name of the outermost page method.
+    The method of the component is the outermost of the consecutive frames of the component, e.g. input_text() rather
+    than locate() for a TextInput.
+    """
+    component = method = page_method = None
+    attributed = False
+    while frame is not None:
+        instance = frame.f_locals.get('self')
+        if component is not None and instance is not component:
+            attributed = True
+        if isinstance(instance, ElementWithTraits):
+            if not attributed:
+                component, method = instance, frame.f_code.co_name
+            if isinstance(instance, Page):
+                page_method = instance.name + '.' + frame.f_code.co_name
+        frame = frame.f_back
+    if component is None:
+        return UNATTRIBUTED, '', UNATTRIBUTED
+    return component.name, method, page_method if page_method is not None else UNATTRIBUTED
+
+
+def _payload_size(value):
+    if value is None:
+        return 0
+    return len(json.dumps(value, default=_serializable))
+
+
+def _serializable(value):
+    if isinstance(value, WebElement):
+        return {'ELEMENT': value.id}
+    return str(value)
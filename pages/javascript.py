@@ -0,0 +1,97 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+Browser-side helpers used to resolve WebDriver locators with a single execute_script call.
+"""
+from selenium.webdriver.common.by import By
+
+
+TRANSLATABLE_LOCATORS = (By.ID, By.XPATH, By.CSS_SELECTOR, By.NAME, By.CLASS_NAME, By.TAG_NAME)
+
+# Defines pagesFindElements(by, value, context), the browser-side equivalent of find_elements for the locator
+# types in TRANSLATABLE_LOCATORS. It returns an array of elements in document order. Ids are looked up in the id map of
+# the document, so only the first element with a duplicated id is found from the document. Ids from an element, and
+# names, are matched by CSS selectors, or by walking all descendants in browsers without CSS.escape.
+FIND_ELEMENTS = """
+var pagesFindElements = function (by, value, context) {
+    context = context || document;
+    var elements = [], i;
+    var byAttribute = function (name) {
+        var candidates = context.getElementsByTagName('*');
+        for (i = 0; i < candidates.length; i++) {
+            if (candidates[i].getAttribute(name) === value) {
+                elements.push(candidates[i]);
+            }
+        }
+        return elements;
+    };
+    var toArray = function (nodes) {
+        for (i = 0; i < nodes.length; i++) {
+            elements.push(nodes[i]);
+        }
+        return elements;
+    };
+    if (by === 'xpath') {
+        var snapshot = document.evaluate(value, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (i = 0; i < snapshot.snapshotLength; i++) {
+            elements.push(snapshot.snapshotItem(i));
+        }
+        return elements;
+    }
+    if (by === 'css selector') {
+        return toArray(context.querySelectorAll(value));
+    }
+    if (by === 'class name') {
+        return toArray(context.getElementsByClassName(value));
+    }
+    if (by === 'tag name') {
+        return toArray(context.getElementsByTagName(value));
+    }
+    if (by === 'id' && context === document) {
+        var element = document.getElementById(value);
+        return element !== null ? [element] : elements;
+    }
+    if (by === 'id' || by === 'name') {
+        if (window.CSS && CSS.escape) {
+            return toArray(context.querySelectorAll('[' + by + '="' + CSS.escape(value) + '"]'));
+        }
+        return byAttribute(by);
+    }
+    throw new Error('locator type not supported in the browser: ' + by);
+};
+"""
+
+# Defines pagesElementText(element), the browser-side equivalent of WebElement.text: the rendered text of the
+# element, trimmed.
+ELEMENT_TEXT = """
+var pagesElementText = function (element) {
+    return (element.innerText !== undefined ? element.innerText : element.textContent).trim();
+};
+"""
+
+
+def is_translatable(locator):
+    """
+    Tells if the locator, in the form of [By.<locator_type>, <locator>], can be resolved by pagesFindElements.
+    """
+    return locator is not None and locator[0] in TRANSLATABLE_LOCATORS
+
+
+def with_find_elements(script):
+    """
+    Returns the script prefixed with the definitions of pagesFindElements and pagesElementText.
+    """
+    return FIND_ELEMENTS + ELEMENT_TEXT + script
@@ -16,6 +16,7 @@
 from abc import ABCMeta, abstractmethod
 
 from pages.element_with_traits import ElementWithTraits
+from pages.timeline import spanned
 
 
 class LoadableElement(ElementWithTraits):
@@ -28,6 +29,8 @@ class LoadableElement(ElementWithTraits):
     def __init__(self, driver, name):
         ElementWithTraits.__init__(self, name)
         self.driver = driver
+        # load() is implemented by subclasses: wrap it to show page loads in timelines (see pages.timeline)
+        self.load = spanned(self.load, name + '.load', 'load')
 
     @abstractmethod  # pragma: no cover
     def load(self):
@@ -0,0 +1,163 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+Timing statistics of the locators resolved by components, tables and pages, to find slow locators, e.g. deep XPaths
+evaluated from the document root. Enable them with enable_locator_statistics().
+"""
+import threading
+
+from selenium.webdriver.common.by import By
+
+from pages.wait.deadline import now
+
+DOCUMENT = 'document'
+ELEMENT = 'element'
+
+_locator_statistics = None
+_locator_statistics_lock = threading.Lock()
+
+
+class LocatorTiming(object):
+    """
+    Timing of the lookups of a locator from the given scope, DOCUMENT or ELEMENT (i.e. relative to a parent element).
+    """
+    __slots__ = ('by', 'value', 'scope', 'count', 'total_time', 'max_time', 'misses')
+
+    def __init__(self, by, value, scope):
+        self.by = by
+        self.value = value
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.misses = 0  # lookups which found no element
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count if self.count > 0 else 0.0
+
+    @property
+    def deep_xpath(self):
+        """
+        True for XPaths searching all descendants of the document, e.g. //div[@class='result'], which the browser
+        evaluates by walking the whole DOM. They do so even when looked up from an element, e.g. with
+        element.find_elements(By.XPATH, '//td'), which is usually meant to be './/td'.
+        """
+        return self.by == By.XPATH and (self.value.startswith('//') or self.value.startswith('(//'))
+
+    @property
+    def warning(self):
+        """
+        Returns why the locator is likely slow, None if there is no known reason.
+        """
+        if not self.deep_xpath:
+            return None
+        return 'deep XPath from document root' if self.scope == DOCUMENT else 'absolute XPath used from an element'
+
+    def __str__(self):
+        return "{0}={1} from {2}".format(self.by, self.value, self.scope)
+
+
+class LocatorStatistics(object):
+    """
+    Timings of lookups by locator and scope.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings = {}  # (by, value, scope) -> LocatorTiming
+
+    def record(self, locator, scope, seconds, found=True):
+        by, value = locator
+        with self._lock:
+            timing = self._timings.get((by, value, scope))
+            if timing is None:
+                timing = self._timings[(by, value, scope)] = LocatorTiming(by, value, scope)
+            timing.count += 1
+            timing.total_time += seconds
+            timing.max_time = max(timing.max_time, seconds)
+            if not found:
+                timing.misses += 1
+
+    def reset(self):
+        with self._lock:
+            self._timings = {}
+
+    def timings(self):
+        with self._lock:
+            return list(self._timings.values())
+
+    def slowest(self, limit=10):
+        """
+        Returns the LocatorTimings with the most time spent in lookups, slowest first.
+        """
+        return sorted(self.timings(), key=lambda timing: (-timing.total_time, -timing.count))[:limit]
+
+    def report(self, limit=10):
+        """
+        Returns a text report of the slowest locators. XPaths searching the whole document are marked.
+        """
+        timings = self.timings()
+        lines = ["{0} lookups of {1} locators in {2:.3f} seconds".format(
+            sum(timing.count for timing in timings), len(timings), sum(timing.total_time for timing in timings)),
+            "", "Slowest locators:"]
+        for timing in self.slowest(limit):
+            lines.append("  {0:>6}  {1:>10.1f} ms  {2:>8.1f} ms mean  {3:>8.1f} ms max  {4:>6} missed  {5}{6}".format(
+                timing.count, timing.total_time * 1000, timing.mean_time * 1000, timing.max_time * 1000,
+                timing.misses, timing, '  (' + timing.warning + ')' if timing.warning is not None else ''))
+        return '\n'.join(lines)
+
+
+def timed_lookup(find, locator, scope):
+    """
+    Returns the result of find(by, value), a lookup of locator from scope, recording its time when statistics are
+    enabled.
+    A lookup raising, e.g. NoSuchElementException, or returning no elements is recorded as missed.
+    """
+    statistics = _locator_statistics
+    if statistics is None:
+        return find(*locator)
+    start_time = now()
+    found = False
+    try:
+        result = find(*locator)
+        found = result != []
+        return result
+    finally:
+        statistics.record(locator, scope, now() - start_time, found)
+
+
+def enable_locator_statistics():
+    """
+    Enables locator statistics, replacing those enabled before. Returns the LocatorStatistics.
+    """
+    global _locator_statistics
+    with _locator_statistics_lock:
+        _locator_statistics = LocatorStatistics()
+        return _locator_statistics
+
+
+def disable_locator_statistics():
+    global _locator_statistics
+    with _locator_statistics_lock:
+        _locator_statistics = None
+
+
+def get_locator_statistics():
+    """
+    Returns the enabled LocatorStatistics, None if they are not enabled.
+    """
+    return _locator_statistics
@@ -14,14 +14,30 @@
 # limitations under the License.                                           #
 ############################################################################
 from abc import abstractmethod, ABCMeta
+import logging
 import os
 
+from selenium.common.exceptions import WebDriverException
+
+from pages.javascript import is_translatable, with_find_elements
 from pages.loadable_element import LoadableElement
+from pages.locator_statistics import timed_lookup, DOCUMENT
 
 
 DEFAULT_PAGE_TIMEOUT = 30
 DEFAULT_PAGE_POLLING = 2
 
+LOCATE_ALL_SCRIPT = with_find_elements("""
+var locators = arguments[0], located = [];
+for (var l = 0; l < locators.length; l++) {
+    var found = pagesFindElements(locators[l][0], locators[l][1], document);
+    located.push(found.length > 0 ? found[0] : null);
+}
+return located;
+""")
+
+logger = logging.getLogger(__name__)
+
 
 class Page(LoadableElement):
     """
@@ -39,4 +55,25 @@ class Page(LoadableElement):
         pass  # pragma: no cover
 
     def has_element_with_locator(self, locator):
-        return len(self.driver.find_elements(locator[0], locator[1])) > 0
+        return len(timed_lookup(self.driver.find_elements, locator, DOCUMENT)) > 0
+
+    def locate_all(self, components):
+        """
+        Locates the given UIComponents with a single round-trip to the browser.
+        Components already located are skipped. Components whose locator cannot be resolved in the browser, or
+        whose element is not found, are left to locate themselves on first use.
+        Returns the list of components.
+        """
+        pending = [component for component in components if is_translatable(component._pending_locator())]
+        if len(pending) == 0:
+            return components
+        locators = [list(component._pending_locator()) for component in pending]
+        try:
+            elements = self.driver.execute_script(LOCATE_ALL_SCRIPT, locators)
+        except WebDriverException as ex:
+            logger.debug("Batch locate failed, components will be located one by one: {0}".format(str(ex)))
+            return components
+        for component, element in zip(pending, elements):
+            if element is not None:
+                component._bind_web_element(element)
+        return components
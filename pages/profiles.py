@@ -0,0 +1,271 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+Load profiles record how long pages and components of each class take to load, in a JSON file kept across runs,
+and derive from them the polling interval of wait_until_loaded() and a soft timeout, whose excess is logged.
+Enable them by setting the PAGES_LOAD_PROFILES environment variable to the path of the file, or with
+enable_load_profiles(path).
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # pragma: no cover
+
+from pages.wait.metrics import MetricsSink, add_sink, remove_sink
+
+LOAD_PROFILES_ENVIRONMENT_VARIABLE = 'PAGES_LOAD_PROFILES'
+MINIMUM_POLLING_TIME = 0.05
+
+logger = logging.getLogger(__name__)
+
+_load_profiles = None
+_load_profiles_lock = threading.Lock()
+
+
+class LoadProfiles(MetricsSink):
+    """
+    Store of the times to ready of each class of ElementWithTraits, and of each of its traits.
+    It is fed by the metrics of waits (see pages.wait.metrics): only waits which succeeded are recorded.
+    """
+
+    def __init__(self, path, history=200, minimum_samples=10, margin=2, minimum_timeout=1, flush_every=20):
+        """
+        :param history: number of most recent times to ready kept for each class and trait.
+        :param minimum_samples: number of times to ready needed before timing is derived for a class.
+        :param margin: the soft timeout is the 99th percentile of times to ready multiplied by margin.
+        :param minimum_timeout: soft timeout derived for a class is never lower than this.
+        :param flush_every: number of times to ready recorded before they are written to the file. See flush().
+        """
+        self.path = path
+        self.history = history
+        self.minimum_samples = minimum_samples
+        self.margin = margin
+        self.minimum_timeout = minimum_timeout
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        try:
+            self._profiles = self._read()
+        except ValueError as ex:
+            logger.warning("Ignoring load profiles in {0}: {1}".format(self.path, str(ex)))
+            self._profiles = {}
+        self._pending = {}  # times recorded since the profiles were last written, by key
+        self._pending_count = 0
+
+    def emit(self, metrics):
+        if metrics.element is None or metrics.outcome != 'success':
+            return
+        key = profile_key(metrics.element)
+        soft_timeout = self.soft_timeout(key)
+        if soft_timeout is not None and metrics.duration > soft_timeout:
+            logger.warning("{0} took {1:.3f} seconds to load, over its soft timeout of {2:.3f} seconds".format(
+                metrics.name, metrics.duration, soft_timeout))
+        self.record(key, metrics.duration, metrics.traits_first_true)
+
+    def record(self, key, time_to_ready, traits_first_true=None):
+        """
+        Records the time to ready of an element of the class identified by key. The profiles are written to the file
+        every flush_every records.
+        :param traits_first_true: optional dictionary of trait description -> seconds until it was first true.
+        """
+        with self._lock:
+            for profiles in [self._profiles, self._pending]:
+                profile = profiles.setdefault(key, {'load_times': [], 'traits': {}})
+                self._extend(profile['load_times'], [time_to_ready])
+                for description, seconds in (traits_first_true or {}).items():
+                    self._extend(profile['traits'].setdefault(description, []), [seconds])
+            self._pending_count += 1
+            if self._pending_count >= self.flush_every:
+                self._write()
+
+    def flush(self):
+        """
+        Writes the times recorded since the last write to the file. Called when load profiles are disabled, and at
+        exit for those enabled.
+        """
+        with self._lock:
+            if self._pending_count > 0:
+                self._write()
+
+    def load_times(self, key):
+        with self._lock:
+            return list(self._profiles.get(key, {}).get('load_times', []))
+
+    def trait_times(self, key, description):
+        with self._lock:
+            return list(self._profiles.get(key, {}).get('traits', {}).get(description, []))
+
+    def percentile(self, key, percentile):
+        """
+        Returns the given percentile (0-100) of the recorded times to ready of the class, None if there is none.
+        """
+        return _percentile(self.load_times(key), percentile)
+
+    def soft_timeout(self, key):
+        """
+        Returns the soft timeout derived for the class, None if not enough loads have been recorded. Loads taking
+        longer are logged as warnings, but waits are not stopped before the timeout they are given.
+        """
+        load_times = self.load_times(key)
+        if len(load_times) < self.minimum_samples:
+            return None
+        return max(self.minimum_timeout, _percentile(load_times, 99) * self.margin)
+
+    def polling_time(self, key):
+        """
+        Returns the polling interval derived for the class, a quarter of its median time to ready, None if not
+        enough loads have been recorded.
+        """
+        load_times = self.load_times(key)
+        if len(load_times) < self.minimum_samples:
+            return None
+        return max(MINIMUM_POLLING_TIME, _percentile(load_times, 50) / 4.0)
+
+    def timing(self, element, timeout, polling_time):
+        """
+        Returns the timeout and polling time to use to wait for the element, given the default ones.
+        The timeout is kept: a load which is only slower than usual should not fail, nor go unrecorded. The polling
+        time derived from profiles is never longer than the default one.
+        """
+        profile_polling_time = self.polling_time(profile_key(element))
+        if profile_polling_time is None:
+            return timeout, polling_time
+        return timeout, min(polling_time, profile_polling_time)
+
+    def _extend(self, times, values):
+        times.extend(values)
+        del times[:-self.history]
+
+    def _read(self):
+        """
+        Returns the profiles in the file. Raises ValueError if it is not valid JSON.
+        """
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as profiles_file:
+            return json.load(profiles_file).get('profiles', {})
+
+    def _write(self):
+        """
+        Merges the times recorded since the last write into the file, so that processes sharing it, e.g. parallel
+        test workers, do not lose each other's times. The file is locked while merging, where fcntl is available,
+        and written to a temporary file of the process first, so that an interrupted run does not leave a corrupted
+        file. A file which cannot be read, e.g. corrupted by hand, is not overwritten, as the times of other processes
+        would be lost: the times recorded are kept in memory, up to history per class and trait, until it can be read.
+        """
+        with _locked(self.path + '.lock'):
+            try:
+                profiles = self._read()
+            except ValueError as ex:
+                logger.warning("Not writing load profiles to {0}, which cannot be read: {1}".format(
+                    self.path, str(ex)))
+                self._pending_count = 0  # tried again after flush_every more records
+                return
+            for key, pending in self._pending.items():
+                profile = profiles.setdefault(key, {'load_times': [], 'traits': {}})
+                self._extend(profile['load_times'], pending['load_times'])
+                for description, times in pending['traits'].items():
+                    self._extend(profile['traits'].setdefault(description, []), times)
+            temporary_path = '{0}.{1}.tmp'.format(self.path, os.getpid())
+            with open(temporary_path, 'w') as profiles_file:
+                json.dump({'profiles': profiles}, profiles_file, sort_keys=True)
+            os.rename(temporary_path, self.path)
+        self._profiles = profiles
+        self._pending = {}
+        self._pending_count = 0
+
+
+def profile_key(element):
+    """
+    Profiles are kept by class: returns the qualified name of the class of the element.
+    """
+    return type(element).__module__ + '.' + type(element).__name__
+
+
+def enable_load_profiles(path, **kwargs):
+    """
+    Enables load profiles stored in the file at path, replacing those enabled before. Returns the LoadProfiles.
+    Other arguments are passed to LoadProfiles.
+    """
+    global _load_profiles
+    with _load_profiles_lock:
+        if _load_profiles is not None:
+            remove_sink(_load_profiles)
+            _load_profiles.flush()
+        _load_profiles = add_sink(LoadProfiles(path, **kwargs))
+        return _load_profiles
+
+
+def disable_load_profiles():
+    """
+    Disables load profiles, writing the times recorded to their file.
+    """
+    global _load_profiles
+    with _load_profiles_lock:
+        if _load_profiles is not None:
+            remove_sink(_load_profiles)
+            _load_profiles.flush()
+        _load_profiles = None
+
+
+def get_load_profiles():
+    """
+    Returns the enabled LoadProfiles, None if they are not enabled.
+    On first call, they are enabled if the PAGES_LOAD_PROFILES environment variable is set.
+    """
+    global _load_profiles
+    if _load_profiles is None and os.getenv(LOAD_PROFILES_ENVIRONMENT_VARIABLE):
+        with _load_profiles_lock:
+            if _load_profiles is None:
+                _load_profiles = add_sink(LoadProfiles(os.getenv(LOAD_PROFILES_ENVIRONMENT_VARIABLE)))
+    return _load_profiles
+
+
+@atexit.register
+def _flush_load_profiles():
+    load_profiles = _load_profiles
+    if load_profiles is not None:
+        load_profiles.flush()
+
+
+@contextmanager
+def _locked(path):
+    if fcntl is None:  # pragma: no cover
+        yield  # pragma: no cover
+        return  # pragma: no cover
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _percentile(values, percentile):
+    """
+    Nearest-rank percentile.
+    """
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    return values[max(0, int(math.ceil(percentile / 100.0 * len(values))) - 1)]
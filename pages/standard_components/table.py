@@ -13,9 +13,110 @@
 # See the License for the specific language governing permissions and      #
 # limitations under the License.                                           #
 ############################################################################
+import re
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping  # pragma: no cover
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 
 from pages.element_with_language import ElementWithLanguage
+from pages.exceptions import IllegalStateException
+from pages.javascript import is_translatable, with_find_elements
+from pages.locator_statistics import timed_lookup, ELEMENT
 from pages.ui_component import UIComponent
+from pages.wait.wait import Wait
+
+
+DEFAULT_ROWS_TIMEOUT = 5
+DEFAULT_ROWS_POLLING_TIME = 0.5
+
+# syntax of regular expressions which JavaScript and Python do not share: named groups, lookbehind, inline flags,
+# comments and the \A, \Z and \z anchors
+NON_PORTABLE_REGEX = re.compile(r'\(\?[<P#aiLmsux]|\\[AZz]')
+
+
+ROWS_DATA_SCRIPT = with_find_elements("""
+var table = arguments[0], rowLocator = arguments[1], cellLocator = arguments[2], attributes = arguments[3];
+var cellValue = function (cell) {
+    var text = pagesElementText(cell);
+    if (!attributes) {
+        return text;
+    }
+    var value = {'text': text};
+    for (var a = 0; a < attributes.length; a++) {
+        value[attributes[a]] = cell.getAttribute(attributes[a]);
+    }
+    return value;
+};
+var rows = pagesFindElements(rowLocator[0], rowLocator[1], table), data = [];
+for (var r = 0; r < rows.length; r++) {
+    data.push(pagesFindElements(cellLocator[0], cellLocator[1], rows[r]).map(cellValue));
+}
+return data;
+""")
+
+ROWS_WITH_KEYS_SCRIPT = with_find_elements("""
+var table = arguments[0], rowLocator = arguments[1], keyAttribute = arguments[2];
+return pagesFindElements(rowLocator[0], rowLocator[1], table).map(function (row) {
+    return [row, keyAttribute ? row.getAttribute(keyAttribute) : (row.textContent || '').trim()];
+});
+""")
+
+# Reads headers and cell texts of all rows. The version of the table content is kept in the __pagesVersion property
+# of the table element, so that the DOM of the application is left untouched. A MutationObserver bumps it on the
+# first change of the content and then disconnects: it is installed again by the next read.
+ROWS_SNAPSHOT_SCRIPT = with_find_elements("""
+var table = arguments[0], rowLocator = arguments[1], cellLocator = arguments[2], headerLocator = arguments[3];
+if (!table.__pagesObserver) {
+    table.__pagesVersion = table.__pagesVersion || 0;
+    table.__pagesObserver = new MutationObserver(function () {
+        table.__pagesVersion += 1;
+        table.__pagesObserver.disconnect();
+        delete table.__pagesObserver;
+    });
+    table.__pagesObserver.observe(table, {childList: true, subtree: true, characterData: true});
+}
+var rows = pagesFindElements(rowLocator[0], rowLocator[1], table), cells = [];
+for (var r = 0; r < rows.length; r++) {
+    cells.push(pagesFindElements(cellLocator[0], cellLocator[1], rows[r]).map(pagesElementText));
+}
+var headers = headerLocator ?
+    pagesFindElements(headerLocator[0], headerLocator[1], table).map(pagesElementText) : null;
+return [table.__pagesVersion, headers, rows, cells];
+""")
+
+FILTER_ROWS_SCRIPT = with_find_elements("""
+var table = arguments[0], rowLocator = arguments[1], cellLocator = arguments[2], headerLocator = arguments[3];
+var column = arguments[4], operator = arguments[5], operand = arguments[6], asData = arguments[7];
+if (typeof column !== 'number') {
+    var headers = headerLocator ?
+        pagesFindElements(headerLocator[0], headerLocator[1], table).map(pagesElementText) : [];
+    column = headers.indexOf(column);
+    if (column < 0) {
+        return {unknownColumn: headers};
+    }
+}
+var matches = {
+    'equals': function (text) { return text === operand; },
+    'contains': function (text) { return text.indexOf(operand) >= 0; },
+    'regex': function (text) { return new RegExp(operand).test(text); }
+}[operator];
+var rows = pagesFindElements(rowLocator[0], rowLocator[1], table), found = [];
+for (var r = 0; r < rows.length; r++) {
+    var cells = pagesFindElements(cellLocator[0], cellLocator[1], rows[r]);
+    if (column < cells.length && matches(pagesElementText(cells[column]))) {
+        found.push([r, asData ? cells.map(pagesElementText) : rows[r]]);
+    }
+}
+return found;
+""")
+
+TABLE_VERSION_SCRIPT = "return arguments[0].__pagesVersion;"
+
+SCROLL_INTO_VIEW_SCRIPT = "arguments[0].scrollIntoView(false);"
 
 
 class Table(UIComponent, ElementWithLanguage):
@@ -32,6 +133,11 @@ class Table(UIComponent, ElementWithLanguage):
     How to use it:
     table = Table(driver, "table", [By.XPATH, ".//tr"], Item, "item", [By.XPATH, "//table[@class='atable']"])
     table.get_items()
+    table.get_rows_data([By.XPATH, "./td"])
+    table.with_columns([By.XPATH, "./td"], [By.XPATH, ".//th"]).find_row(Id='1234')
+    table.filter_rows('Status', equals='Failed')
+    for item in table.iter_items(next_page=NextButton(driver).click):
+        ...
 
     Notice Item must be a subclass of UIComponent.
     """
@@ -44,19 +150,312 @@ class Table(UIComponent, ElementWithLanguage):
         self._item_relative_locator = item_relative_locator
         self._item_class = item_class
         self._item_name = item_name
+        self._cell_locator = None
+        self._header_locator = None
+        self._column_names = None
+        self._snapshot = None
+
+    def with_columns(self, cell_locator, header_locator=None, names=None):
+        """
+        Defines the columns of the table, which are needed to look rows up by column value.
+        :param cell_locator: locator of the cells, relative to a row. E.g. [By.XPATH, "./td"]
+        :param header_locator: locator of the header cells holding the column names, relative to the table.
+        :param names: list of column names, for tables without a header.
+        Returns an instance of the class.
+        """
+        if header_locator is None and names is None:
+            raise ValueError("either header_locator or names should be given")
+        self._cell_locator = cell_locator
+        self._header_locator = header_locator
+        self._column_names = names
+        self._snapshot = None
+        return self
 
     def get_items(self):
-        if self._item_has_language():
-            return [self._item_class(self.driver, "{0} #{1}".format(self._item_name, index)).from_web_element(item)
-                        .with_language(self.language) for index, item in
-                    self._enumerate_table_elements(self.locate())]
+        """
+        Returns a TableItems sequence. Items are only created when they are accessed.
+        """
+        return TableItems(self._find_table_elements(self.locate()), self._build_item)
+
+    def get_rows_data(self, cell_locator, attributes=None):
+        """
+        Reads the content of the whole table with a single round-trip to the browser.
+        :param cell_locator: locator of the cells, relative to a row. E.g. [By.XPATH, "./td"]
+        :param attributes: optional list of attribute names to read from every cell.
+        :return: a list containing, for each row, the list of its cell texts. When attributes are given, each cell
+        is a dictionary with the 'text' key and one key per attribute.
+        """
+        if not is_translatable(self._item_relative_locator) or not is_translatable(cell_locator):
+            return [[self._cell_value(cell, attributes) for cell in row.find_elements(*cell_locator)]
+                    for index, row in self._enumerate_table_elements(self.locate())]
+        return self._execute_script(ROWS_DATA_SCRIPT, list(self._item_relative_locator), list(cell_locator),
+                                    attributes)
+
+    def iter_items(self, next_page=None, scroll=False, page_size=None, row_key=None, timeout=DEFAULT_ROWS_TIMEOUT,
+                   polling_time=DEFAULT_ROWS_POLLING_TIME):
+        """
+        Generator yielding the items of a paginated or infinite-scroll table as they are loaded.
+        Rows are told apart by a key, so that rows already yielded are skipped. Iteration stops when no new row
+        appears within timeout after moving to the next page. Only the keys of the rows seen are kept in memory.
+        :param next_page: optional callable which moves the table to the next page, e.g. the click method of a
+        Button. It may return False when there are no more pages.
+        :param scroll: if True, the last row is scrolled into view to have more rows loaded.
+        :param page_size: optional number of rows in a full page. A shorter page is taken as the last one.
+        :param row_key: optional name of the attribute holding the key of a row. The text of the row by default.
+        """
+        seen_keys = set()
+        index = 0
+        rows = self._rows_with_keys(row_key)
+        while True:
+            for web_element, key in rows:
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    yield self._build_item(index, web_element)
+                    index += 1
+            if len(rows) == 0 or (page_size is not None and len(rows) < page_size):
+                return
+            if not self._load_more_rows(rows, next_page, scroll):
+                return
+            try:
+                rows = Wait(timeout, polling_time)\
+                    .with_ignored_exceptions(StaleElementReferenceException)\
+                    .until_condition(lambda: self._rows_with_new_keys(seen_keys, row_key), "new rows are loaded")
+            except TimeoutException:
+                return
+
+    def index_by(self, column):
+        """
+        Returns a TableIndex mapping the text of the given column to the row holding it.
+        The whole table is read with one round-trip to the browser, and reused until the table content changes.
+        """
+        return TableIndex(self._get_snapshot().positions_by(column), self._snapshot.items)
+
+    def find_row(self, **column_matches):
+        """
+        Returns the first row whose cells match the given column texts, None if there is no such row.
+        E.g. table.find_row(Id='1234', Status='Failed')
+        Lookups are served from the index built by index_by().
+        """
+        if len(column_matches) == 0:
+            raise ValueError("at least one column should be given")
+        columns = sorted(column_matches.keys())
+        snapshot = self._get_snapshot()
+        for position in snapshot.positions_by(columns[0]).get(column_matches[columns[0]], []):
+            if all(snapshot.cell(position, column) == column_matches[column] for column in columns[1:]):
+                return snapshot.items[position]
+        return None
+
+    def filter_rows(self, column, equals=None, contains=None, regex=None, as_data=False):
+        """
+        Returns the rows whose cell in the given column matches the predicate. Exactly one of equals, contains and
+        regex should be given.
+        The predicate is evaluated in the browser, so only matching rows are sent back, with one round-trip. Tables
+        whose locators cannot be resolved in the browser are filtered in Python instead, so regex is searched for
+        with JavaScript RegExp or with Python re: it should only use the syntax they share, i.e. no named groups,
+        lookbehind, inline flags, comments or \\A, \\Z and \\z anchors. A ValueError is raised otherwise.
+        :param as_data: if True, the cell texts of the matching rows are returned instead of the items.
+        E.g. table.filter_rows('Status', equals='Failed')
+        """
+        predicates = [(operator, operand) for operator, operand in
+                      [('equals', equals), ('contains', contains), ('regex', regex)] if operand is not None]
+        if len(predicates) != 1:
+            raise ValueError("exactly one of equals, contains and regex should be given")
+        if regex is not None and NON_PORTABLE_REGEX.search(regex):
+            raise ValueError("regex '{0}' uses syntax which JavaScript and Python do not share".format(regex))
+        if self._cell_locator is None:
+            raise IllegalStateException("columns of table '{0}' are not defined, see with_columns()".format(self.name))
+        operator, operand = predicates[0]
+        locators = [self._item_relative_locator, self._cell_locator, self._header_locator or self._cell_locator]
+        if not all(is_translatable(locator) for locator in locators):
+            return self._filter_rows_locally(column, operator, operand, as_data)
+        column_reference = _column_index(self._column_names, column) if self._column_names is not None else column
+        found = self._execute_script(FILTER_ROWS_SCRIPT, list(self._item_relative_locator), list(self._cell_locator),
+                                     list(self._header_locator) if self._header_locator is not None else None,
+                                     column_reference, operator, operand, as_data)
+        if isinstance(found, dict):  # the headers, as the column is not one of them
+            _column_index(found['unknownColumn'], column)
+        if as_data:
+            return [cells for position, cells in found]
+        return [self._build_item(position, web_element) for position, web_element in found]
+
+    def _filter_rows_locally(self, column, operator, operand, as_data):
+        snapshot = self._get_snapshot()
+        matches = {'equals': lambda text: text == operand,
+                   'contains': lambda text: text is not None and operand in text,
+                   'regex': lambda text: text is not None and re.search(operand, text) is not None}[operator]
+        positions = [position for position in range(len(snapshot.cells)) if matches(snapshot.cell(position, column))]
+        if as_data:
+            return [snapshot.cells[position] for position in positions]
+        return [snapshot.items[position] for position in positions]
+
+    def _get_snapshot(self):
+        if self._cell_locator is None:
+            raise IllegalStateException("columns of table '{0}' are not defined, see with_columns()".format(self.name))
+        if self._snapshot is not None and self._snapshot.version is not None \
+                and self._execute_script(TABLE_VERSION_SCRIPT) == self._snapshot.version:
+            return self._snapshot
+        if is_translatable(self._item_relative_locator) and is_translatable(self._cell_locator) \
+                and (self._header_locator is None or is_translatable(self._header_locator)):
+            version, headers, rows, cells = self._execute_script(
+                ROWS_SNAPSHOT_SCRIPT, list(self._item_relative_locator), list(self._cell_locator),
+                list(self._header_locator) if self._header_locator is not None else None)
         else:
-            return [self._item_class(self.driver, "{0} #{1}".format(self._item_name, index)).from_web_element(item) for
-                    index, item in self._enumerate_table_elements(self.locate())]
+            table = self.locate()
+            version = None
+            headers = [header.text for header in table.find_elements(*self._header_locator)] \
+                if self._header_locator is not None else None
+            rows = self._find_table_elements(table)
+            cells = [[cell.text for cell in row.find_elements(*self._cell_locator)] for row in rows]
+        self._snapshot = _TableSnapshot(version, self._column_names or headers, TableItems(rows, self._build_item),
+                                        cells)
+        return self._snapshot
+
+    def _rows_with_keys(self, row_key):
+        if not is_translatable(self._item_relative_locator):
+            return [(web_element, web_element.get_attribute(row_key) if row_key else web_element.text)
+                    for web_element in self._find_table_elements(self.locate())]
+        return [(web_element, key) for web_element, key in
+                self._execute_script(ROWS_WITH_KEYS_SCRIPT, list(self._item_relative_locator), row_key)]
+
+    def _rows_with_new_keys(self, seen_keys, row_key):
+        rows = self._rows_with_keys(row_key)
+        for web_element, key in rows:
+            if key not in seen_keys:
+                return rows
+        return None
+
+    def _load_more_rows(self, rows, next_page, scroll):
+        if next_page is not None and next_page() is False:
+            return False
+        if scroll:
+            self.driver.execute_script(SCROLL_INTO_VIEW_SCRIPT, rows[-1][0])
+        return next_page is not None or scroll
 
     def _enumerate_table_elements(self, table):
-        by, locator = self._item_relative_locator
-        return enumerate(table.find_elements(by=by, value=locator))
+        return enumerate(self._find_table_elements(table))
+
+    def _find_table_elements(self, table):
+        return timed_lookup(table.find_elements, self._item_relative_locator, ELEMENT)
+
+    def _build_item(self, index, web_element):
+        item = self._item_class(self.driver, "{0} #{1}".format(self._item_name, index)).from_web_element(web_element)
+        if self._item_has_language():
+            item.with_language(self.language)
+        return item
+
+    @staticmethod
+    def _cell_value(cell, attributes):
+        if not attributes:
+            return cell.text
+        value = {'text': cell.text}
+        for attribute in attributes:
+            value[attribute] = cell.get_attribute(attribute)
+        return value
 
     def _item_has_language(self):
         return issubclass(self._item_class, ElementWithLanguage)
+
+
+class TableItems(object):
+    """
+    Lazy sequence of the items of a Table. It supports len(), indexing, slicing and iteration.
+    Only the WebElements of the rows are held: an item is created on first access and then reused.
+    """
+    __slots__ = ('_web_elements', '_build_item', '_positions', '_items')
+
+    def __init__(self, web_elements, build_item, positions=None, items=None):
+        """
+        :param web_elements: the WebElements of all rows of the table.
+        :param build_item: callable creating the item from its index in the table and its WebElement.
+        :param positions: indexes of web_elements in this sequence, when it is a slice of another sequence.
+        :param items: items already created, by index in the table.
+        """
+        self._web_elements = web_elements
+        self._build_item = build_item
+        self._positions = positions
+        self._items = items if items is not None else {}
+
+    def __len__(self):
+        if self._positions is None:
+            return len(self._web_elements)
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            positions = [self._position(i) for i in range(*index.indices(len(self)))]
+            return TableItems(self._web_elements, self._build_item, positions, self._items)
+        position = self._position(index)
+        item = self._items.get(position)
+        if item is None:
+            item = self._build_item(position, self._web_elements[position])
+            self._items[position] = item
+        return item
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def _position(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("table item index out of range")
+        if self._positions is None:
+            return index
+        return self._positions[index]
+
+
+class TableIndex(Mapping):
+    """
+    Read-only mapping from the text of a column to the first row holding it.
+    Rows are created on first access.
+    """
+
+    def __init__(self, positions, items):
+        self._positions = positions
+        self._items = items
+
+    def __getitem__(self, key):
+        return self._items[self._positions[key][0]]
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+
+class _TableSnapshot(object):
+    """
+    Content of a table as read from the browser, with the positions of rows indexed by column text.
+    """
+    __slots__ = ('version', 'columns', 'items', 'cells', '_indexes')
+
+    def __init__(self, version, columns, items, cells):
+        self.version = version
+        self.columns = columns
+        self.items = items
+        self.cells = cells
+        self._indexes = {}
+
+    def cell(self, position, column):
+        row = self.cells[position]
+        index = _column_index(self.columns, column)
+        return row[index] if index < len(row) else None
+
+    def positions_by(self, column):
+        if column not in self._indexes:
+            index = _column_index(self.columns, column)
+            positions = {}
+            for position, row in enumerate(self.cells):
+                if index < len(row):
+                    positions.setdefault(row[index], []).append(position)
+            self._indexes[column] = positions
+        return self._indexes[column]
+
+
+def _column_index(columns, column):
+    try:
+        return columns.index(column)
+    except ValueError:
+        raise ValueError("table has no column '{0}', columns are: {1}".format(column, columns))
@@ -0,0 +1,129 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+Timeline of page loads, waits, polls, trait evaluations and WebDriver commands, exported as Chrome trace event JSON,
+which opens in chrome://tracing or Perfetto.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_recorders = []
+_recorders_lock = threading.Lock()
+
+
+class TimelineRecorder(object):
+    """
+    Records spans while started. Spans of each thread are nested by time, as in the call stack.
+    Usable as context manager:
+
+        with TimelineRecorder(driver) as timeline:
+            LoginPage(driver).load().wait_until_loaded()
+        timeline.save('login.json')
+    """
+
+    def __init__(self, driver=None):
+        """
+        :param driver: optional driver whose commands are recorded. It is traced (see pages.instrumentation) while
+        the recorder is started.
+        """
+        self.driver = driver
+        self.events = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._tracing_driver = None
+
+    def start(self):
+        if self.driver is not None:
+            from pages.instrumentation import _acquire_tracing
+            self._tracing_driver = _acquire_tracing(self.driver)
+            self._tracing_driver.add_listener(self._add_command)
+        with _recorders_lock:
+            _recorders.append(self)
+        return self
+
+    def stop(self):
+        with _recorders_lock:
+            _recorders.remove(self)
+        if self._tracing_driver is not None:
+            from pages.instrumentation import _release_tracing
+            self._tracing_driver.remove_listener(self._add_command)
+            _release_tracing(self._tracing_driver)
+            self._tracing_driver = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.stop()
+
+    def add_span(self, name, category, start_time, duration, args=None):
+        """
+        Adds a complete event. Times are in seconds, as returned by time.time().
+        """
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start_time * 1000000, 'dur': duration * 1000000,
+                 'pid': self._pid, 'tid': threading.current_thread().ident}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    def to_json(self):
+        with self._lock:
+            events = list(self.events)
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+    def save(self, path):
+        with open(path, 'w') as trace_file:
+            trace_file.write(self.to_json())
+
+    def _add_command(self, record):
+        self.add_span(record.command, 'command', record.start_time, record.latency,
+                      {'caller': record.caller, 'page method': record.page_method,
+                       'request size': record.request_size, 'response size': record.response_size})
+
+
+@contextmanager
+def span(name, category, **args):
+    """
+    Records the block as a span on the started TimelineRecorder(s). Does nothing when none is started.
+    """
+    if len(_recorders) == 0:
+        yield
+        return
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        duration = time.time() - start_time
+        with _recorders_lock:
+            recorders = list(_recorders)
+        for recorder in recorders:
+            recorder.add_span(name, category, start_time, duration, args)
+
+
+def spanned(function, name, category):
+    """
+    Returns function recording each of its calls as a span.
+    """
+    @functools.wraps(function)
+    def spanned_function(*args, **kwargs):
+        with span(name, category):
+            return function(*args, **kwargs)
+    return spanned_function
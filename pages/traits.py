@@ -13,21 +13,153 @@
 # See the License for the specific language governing permissions and      #
 # limitations under the License.                                           #
 ############################################################################
+import threading
+
+from pages.timeline import span
+from pages.wait.deadline import current_deadline, deadline_bound, now
+
+# Seconds a time-limited condition is given even when the deadline has passed, e.g. on the last poll of a wait
+MINIMUM_TIME_LIMIT = 0.1
 
 
 class Trait(object):
     """
     A trait is an abstraction of the condition that must be verified for an element to be ready.
     """
-    def __init__(self, condition, description):
+    def __init__(self, condition, description, sticky=False, time_limit=None):
         """
         :param condition: it is a callable object that must return a boolean.
         :param description: it is a short description of the condition. E.g. 'page has logo', 'table has 10 elements'
+        :param sticky: True if the condition cannot become false once it is true.
+        :param time_limit: optional seconds after which an evaluation of the condition is given up. See evaluate().
         """
         if not hasattr(condition, '__call__'):
             raise TypeError("condition should be callable")
         self.condition = condition
         self.description = description
+        self.sticky = sticky
+        self.time_limit = time_limit
+        self.exceeded_time_limit = False
+        self._call_in_progress = None
+
+    def evaluate(self):
+        """
+        Returns the value of the condition.
+        With a time limit, the condition runs on a daemon thread. If it does not return within the time limit, it is
+        not true and exceeded_time_limit is set. It is not true either if it does not return before the current
+        deadline (see pages.wait.deadline), though it is given at least MINIMUM_TIME_LIMIT seconds, so that the last
+        poll of a wait can still find it true.
+        The condition is not run again until the call in progress returns, so that a hung condition does not pile up
+        threads: the next evaluation waits for the same call. Notice that the call in progress may still be sending
+        commands to the driver. The result of a call started under another deadline, i.e. by an earlier wait, is
+        never returned: the condition is run again.
+        """
+        with span(self.description, 'trait'):
+            return self._evaluate()
+
+    def _evaluate(self):
+        if self.time_limit is None:
+            return self.condition()
+        deadline = current_deadline()
+        call = self._call_in_progress
+        if call is not None and call.deadline is not deadline and call.wait(0):
+            call = None
+        if call is None:
+            call = _TimedCall(deadline_bound(self.condition), deadline)
+        returned = call.wait(self._time_left(deadline))
+        if returned and call.deadline is not deadline:
+            call = _TimedCall(deadline_bound(self.condition), deadline)
+            returned = call.wait(self._time_left(deadline))
+        self.exceeded_time_limit = not returned and call.elapsed() >= self.time_limit
+        if not returned:
+            self._call_in_progress = call
+            return False
+        self._call_in_progress = None
+        return call.result()
+
+    def _time_left(self, deadline):
+        if deadline is None:
+            return self.time_limit
+        return min(self.time_limit, max(deadline.remaining(), MINIMUM_TIME_LIMIT))
 
     def __str__(self):
         return "condition: " + str(self.condition) + ", " + self.description
+
+
+class _TimedCall(object):
+    """
+    Call of a function on a daemon thread, whose result can be waited for with a timeout.
+    :param deadline: the deadline under which the call was started.
+    """
+    def __init__(self, function, deadline=None):
+        self.deadline = deadline
+        self.start_time = now()
+        self._done = threading.Event()
+        self._value = None
+        self._exception = None
+        thread = threading.Thread(target=self._run, args=(function,))
+        thread.daemon = True
+        thread.start()
+
+    def wait(self, timeout):
+        """
+        Returns True if the call returned within timeout seconds.
+        """
+        return self._done.wait(timeout)
+
+    def elapsed(self):
+        return now() - self.start_time
+
+    def result(self):
+        if self._exception is not None:
+            raise self._exception
+        return self._value
+
+    def _run(self, function):
+        try:
+            self._value = function()
+        except Exception as ex:
+            self._exception = ex
+        finally:
+            self._done.set()
+
+
+class TraitStatistics(object):
+    """
+    Evaluation time and failure rate of traits, by description. Used to evaluate first the traits which are most
+    likely to fail and cheapest to evaluate.
+    """
+    def __init__(self):
+        self._statistics = {}  # description -> [evaluations, failures, total evaluation time]
+
+    def record(self, description, elapsed, is_true):
+        statistics = self._statistics.setdefault(description, [0, 0, 0.0])
+        statistics[0] += 1
+        statistics[1] += 0 if is_true else 1
+        statistics[2] += elapsed
+
+    def cost(self, description):
+        """
+        Expected evaluation time spent per failure detected: the lower, the earlier the trait should be evaluated.
+        Traits never evaluated have cost 0, so that they are learned first.
+        """
+        if description not in self._statistics:
+            return 0
+        evaluations, failures, total_time = self._statistics[description]
+        failure_rate = (failures + 1.0) / (evaluations + 2.0)
+        return total_time / evaluations / failure_rate
+
+    def order(self, traits):
+        """
+        Returns traits sorted by cost. Traits with the same cost keep their order.
+        """
+        return sorted(traits, key=lambda trait: self.cost(trait.description))
+
+    def get(self, description):
+        """
+        Returns a dictionary with evaluations, failures and mean_time of the trait, None if it was never evaluated.
+        """
+        if description not in self._statistics:
+            return None
+        evaluations, failures, total_time = self._statistics[description]
+        return {'evaluations': evaluations, 'failures': failures, 'mean_time': total_time / evaluations}
@@ -13,11 +13,36 @@
 # See the License for the specific language governing permissions and      #
 # limitations under the License.                                           #
 ############################################################################
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.remote.webelement import WebElement
 
 from pages.element_with_traits import ElementWithTraits
+from pages.locator_statistics import timed_lookup, DOCUMENT, ELEMENT
+
+
+class RelocatableWebElement(WebElement):
+    """
+        WebElement which knows how to find itself again.
+        When a command fails with StaleElementReferenceException, the element is re-located through the given
+        callable and the command is retried once against the fresh element.
+    """
+
+    def __init__(self, web_element, relocate):
+        WebElement.__init__(self, web_element.parent, web_element.id)
+        if hasattr(web_element, '_w3c'):  # Selenium 2 and 3 only
+            self._w3c = web_element._w3c
+        self._relocate = relocate
+
+    def relocate(self):
+        self._id = self._relocate().id
+
+    def _execute(self, command, params=None):
+        try:
+            return WebElement._execute(self, command, params)
+        except StaleElementReferenceException:
+            self.relocate()
+            return WebElement._execute(self, command, params)
 
 
 class UIComponent(ElementWithTraits):
@@ -39,7 +64,7 @@ class UIComponent(ElementWithTraits):
         self.driver = driver
         self.__locator = locator
         self._web_element = None
-        self.__cache = False
+        self.__cache = True
 
     def from_web_element(self, web_element):
         """
@@ -55,9 +80,8 @@ class UIComponent(ElementWithTraits):
 
     def cache(self):
         """
-            Disclaimer: Dangerous method. Use it only if you know what you are doing.
-            Enable caching of the element after lazy evaluation.
-            Use in case of elements which are not being updated as results of actions on the page.
+            Enable caching of the element after lazy evaluation. This is the default behaviour.
+            The cached element is re-located from the locator, and the action retried once, when it goes stale.
             Usage:
                 AComponent(a_driver, a_locator).cache()
             Returns an instance of the class.
@@ -65,35 +89,58 @@ class UIComponent(ElementWithTraits):
         self.__cache = True
         return self
 
+    def no_cache(self):
+        """
+            Disable caching of the element, so that it is located on the DOM every time locate() is called.
+            Usage:
+                AComponent(a_driver, a_locator).no_cache()
+            Returns an instance of the class.
+        """
+        self.__cache = False
+        if self.__locator is not None:
+            self._web_element = None
+        return self
+
     def locate(self):
         """
             Lazily locates the element on the DOM if the WebElement instance is not available already.
             Returns a WebElement object.
-            It also caches the element if caching has been set through cache().
+            The element is cached unless caching has been disabled through no_cache(). A cached element which
+            becomes stale is transparently re-located from the locator.
         """
         if self._web_element:
             return self._web_element
         else:
-            locator_type, locator_value = self.__locator
-            element = self.driver.find_element(by=locator_type, value=locator_value)
+            element = self._find_web_element()
+            if self.__cache is True:
+                element = RelocatableWebElement(element, self._find_web_element)
             self._cache_web_element(element)  # cache the element if allowed
             return element
 
     def is_found(self):
         """
-            Evaluates if the element can be found in the DOM.
+            Evaluates if the element can be found in the DOM and has all its traits.
         """
         try:
-            return self.has_all_traits()
+            return self.is_present() and self.has_all_traits()
         except NoSuchElementException:
             return False
 
     def is_present(self):
-        try:
-            self.locate()
+        """
+            Evaluates if the element is in the DOM. The DOM is queried even if the element is cached, so that elements
+            going away, e.g. a spinner, are seen to be gone. When caching, the element found replaces the cached one.
+            A component created from a WebElement, without locator, cannot be looked up again and is always present.
+        """
+        if self.__locator is None:
             return True
-        except NoSuchElementException:  # pragma: no cover
-            return False  # pragma: no cover
+        try:
+            element = self._find_web_element()
+        except NoSuchElementException:
+            self._web_element = None
+            return False
+        self._bind_web_element(element)
+        return True
 
     def click(self):
         self.locate().click()
@@ -106,7 +153,38 @@ class UIComponent(ElementWithTraits):
         Helper method which tries to locate the element within the scope of the current UIComponent.
         :param element_locator: should be in the form of [By.<locator_type>, <locator>]. E.g. [By.ID, "q"]
         """
-        return len(self.locate().find_elements(*element_locator)) > 0
+        return len(timed_lookup(self.locate().find_elements, element_locator, ELEMENT)) > 0
+
+    def _execute_script(self, script, *args):
+        """
+            Executes the script in the browser passing the located element as first argument.
+            If the cached element has become stale, it is located again and the script is retried once.
+        """
+        element = self.locate()
+        try:
+            return self.driver.execute_script(script, element, *args)
+        except StaleElementReferenceException:
+            if not isinstance(element, RelocatableWebElement):
+                raise
+            element.relocate()
+            return self.driver.execute_script(script, element, *args)
+
+    def _pending_locator(self):
+        """
+            Returns the locator of a component which has still to be located and cached, None otherwise.
+        """
+        if self._web_element or self.__cache is not True:
+            return None
+        return self.__locator
+
+    def _bind_web_element(self, element):
+        """
+            Caches an element located on behalf of this component, e.g. by Page.locate_all().
+        """
+        self._cache_web_element(RelocatableWebElement(element, self._find_web_element))
+
+    def _find_web_element(self):
+        return timed_lookup(self.driver.find_element, self.__locator, DOCUMENT)
 
     def _cache_web_element(self, element):
         if self.__cache is True:
@@ -0,0 +1,197 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+"""
+asyncio versions of the wait loops, so that a single thread can wait for many pages at once.
+This module requires Python 3.5 or later and is not imported by the rest of the package.
+"""
+import asyncio
+import inspect
+import logging
+
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+from pages.element_with_traits import DEFAULT_TIMEOUT, DEFAULT_POLLING_TIME
+from pages.exceptions import IllegalStateException, FailureTraitException
+from pages.profiles import get_load_profiles
+from pages.wait.deadline import Deadline, current_deadline, now
+from pages.wait.metrics import recording
+from pages.wait.wait import Wait, POLL_FREQUENCY
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWait(Wait):
+    """
+        Wait whose loops are coroutines sleeping with asyncio.sleep() instead of time.sleep().
+        Conditions and trait conditions can be coroutine functions, which are awaited.
+        Other conditions are called on the event loop, or run in an executor when one is set through with_executor():
+        Selenium calls are blocking, so use an executor when waiting on many browser sessions at once.
+    """
+
+    def __init__(self, timeout, poll_frequency=POLL_FREQUENCY, ignored_exceptions=None, logger=None,
+                 poll_strategy=None, executor=None):
+        Wait.__init__(self, timeout, poll_frequency, ignored_exceptions, logger, poll_strategy)
+        self._executor = executor
+
+    async def until_condition(self, condition, condition_description):
+        """
+        Waits until conditions is True or returns a non-None value.
+        If any of the trait is still not present after timeout, raises a TimeoutException.
+        """
+        if not hasattr(condition, '__call__'):
+            raise TypeError("condition is not callable")
+        deadline = self._deadline()
+        with recording('condition', condition_description, enter=False) as metrics:
+            delays = self._delays()
+            count = 1
+            while True:
+                self._raise_if_cancelled(deadline, condition_description)
+                metrics.poll()
+                try:
+                    value = await self._call(condition)
+                    if value is not None and value is not False:
+                        self._record(deadline)
+                        return value
+                    logger.debug("#" + str(count) + " - wait until " + condition_description)
+                except self._ignored_exceptions as ex:
+                    logger.debug("Captured {0} : {1}".format(ex.__class__.__name__, str(ex)))
+                if deadline.expired():
+                    break
+                await self._async_sleep(next(delays), deadline, metrics)
+                count += 1
+            raise TimeoutException(
+                msg="condition <" + condition_description + "> was not true after " + str(deadline.timeout) +
+                    " seconds.")
+
+    async def until_traits_are_present(self, element_with_traits):
+        """
+        Waits until all traits are present.
+        If any of the traits is still not present after timeout, raises a TimeoutException.
+        """
+        deadline = self._deadline()
+        with recording('traits', element_with_traits.name, enter=False, element=element_with_traits) as metrics:
+            delays = self._delays()
+            count = 1
+            missing_traits_descriptions = []
+            while True:
+                self._raise_if_cancelled(deadline, element_with_traits.name)
+                metrics.poll()
+                try:
+                    missing_traits_descriptions = await self._evaluate_traits(element_with_traits)
+                    if len(missing_traits_descriptions) == 0:
+                        self._record(deadline)
+                        return True
+                    failure_traits = await self._call(element_with_traits.detect_failure_traits)
+                    if len(failure_traits) > 0:
+                        raise FailureTraitException("{0} failed to load: <{1}>".format(element_with_traits.name,
+                                                                                       '> <'.join(failure_traits)))
+                    logger.debug("#{0} - wait until all traits are present: <{1}>".format(str(count), '> <'.join(
+                        missing_traits_descriptions)))
+                except self._ignored_exceptions as ex:
+                    logger.debug("Captured {0}: {1}".format(ex.__class__.__name__, str(ex)))
+                if deadline.expired():
+                    break
+                await self._async_sleep(next(delays), deadline, metrics)
+                count += 1
+            raise TimeoutException(
+                msg="conditions " + '<' + '> <'.join(missing_traits_descriptions) + '>' + " not true after " + str(
+                    deadline.timeout) + " seconds.")
+
+    def with_executor(self, executor):
+        """
+        Set the concurrent.futures executor used to run conditions which are not coroutine functions.
+        """
+        self._executor = executor
+        return self
+
+    async def _call(self, condition):
+        if asyncio.iscoroutinefunction(condition):
+            return await condition()
+        if self._executor is not None:
+            value = await asyncio.get_event_loop().run_in_executor(self._executor, condition)
+        else:
+            value = condition()
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    async def _evaluate_traits(self, element_with_traits):
+        """
+        Evaluates traits of the element. Unless some trait conditions are coroutine functions, this is delegated to
+        ElementWithTraits.evaluate_traits(), so that batching of browser conditions, sticky traits and trait order
+        apply as in Wait.
+        """
+        if not any(asyncio.iscoroutinefunction(trait.condition) for trait in element_with_traits.traits):
+            return await self._call(element_with_traits.evaluate_traits)
+        missing_traits_descriptions = []
+        for trait in element_with_traits.traits:
+            if not await self._call(trait.condition):
+                if not element_with_traits.traits_eager_evaluation:
+                    return [trait.description]
+                missing_traits_descriptions.append(trait.description)
+        return missing_traits_descriptions
+
+    def _deadline(self):
+        """
+        Deadlines of coroutines are not entered: the deadline stack is per thread, while the coroutines of a thread
+        interleave. A coroutine wait is still bounded by the deadline entered around the event loop, if any.
+        """
+        return Deadline(self._timeout, current_deadline(), self._token)
+
+    @staticmethod
+    async def _async_sleep(delay, deadline, metrics):
+        """
+        Wakes up as soon as the cancellation token is set if it is an asyncio.Event. Other tokens, e.g.
+        threading.Event, are checked after each sleep. Cancelling the task running the wait also stops it.
+        """
+        start_time = now()
+        delay = min(delay, deadline.remaining())
+        if deadline.token is not None and asyncio.iscoroutinefunction(deadline.token.wait):
+            try:
+                await asyncio.wait_for(deadline.token.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(delay)
+        metrics.slept(now() - start_time)
+
+
+async def wait_until_loaded(element_with_traits, timeout=DEFAULT_TIMEOUT, polling_time=DEFAULT_POLLING_TIME,
+                            poll_strategy=None, executor=None, cancellation_token=None):
+    """
+    Coroutine version of ElementWithTraits.wait_until_loaded(). Returns the element once all its traits are present.
+    Traits are always polled: waiting in the browser (see with_event_driven_wait()) is not available here.
+    E.g. login_page = await wait_until_loaded(LoginPage(driver).load(), executor=executor)
+    :param executor: optional concurrent.futures executor running trait conditions which are not coroutines.
+    :param cancellation_token: optional asyncio.Event or threading.Event stopping the wait when set.
+    """
+    load_profiles = get_load_profiles()
+    if load_profiles is not None:
+        timeout, polling_time = load_profiles.timing(element_with_traits, timeout, polling_time)
+    element_with_traits.timeout = timeout
+    element_with_traits.polling_time = polling_time
+    wait = AsyncWait(timeout, polling_time, poll_strategy=poll_strategy, executor=executor)\
+        .with_ignored_exceptions(StaleElementReferenceException).with_cancellation(cancellation_token)
+    if len(element_with_traits.traits) == 0:
+        raise IllegalStateException("Element '{0}' has no traits".format(element_with_traits.name))
+    if any(trait.sticky for trait in element_with_traits.traits):
+        element_with_traits._satisfied_traits = {}
+        element_with_traits._polls = 0
+    try:
+        await wait.until_traits_are_present(element_with_traits)
+    finally:
+        element_with_traits._satisfied_traits = None
+    return element_with_traits
@@ -0,0 +1,136 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import threading
+import time
+from contextlib import contextmanager
+
+now = getattr(time, 'monotonic', time.time)  # time.monotonic() is not available on Python 2
+
+_deadlines = threading.local()
+
+
+class Deadline(object):
+    """
+    Point in time by which a wait must end, on a monotonic clock where available.
+    A deadline created within another deadline never ends after it: nested waits share the budget of outer ones.
+    A deadline can also carry a cancellation token, an object like threading.Event, which is set to stop waits early.
+    Deadlines inherit the token of their parent unless given one, and are cancelled when their parent is.
+    """
+
+    def __init__(self, timeout, parent=None, token=None):
+        """
+        :param timeout: seconds until the deadline, None for no other limit than the parent deadline.
+        """
+        self.start_time = now()
+        self.end_time = self.start_time + timeout if timeout is not None else float('inf')
+        self.timeout = timeout
+        self.token = token
+        self.parent = parent
+        if parent is not None and parent.end_time < self.end_time:
+            self.end_time = parent.end_time
+            self.timeout = round(max(0, self.end_time - self.start_time), 3)
+        if parent is not None and token is None:
+            self.token = parent.token
+
+    def remaining(self):
+        """
+        Returns the seconds left before the deadline, 0 if it has passed.
+        """
+        return max(0, self.end_time - now())
+
+    def expired(self):
+        return now() >= self.end_time
+
+    def elapsed(self):
+        return now() - self.start_time
+
+    def cancelled(self):
+        if self.token is not None and self.token.is_set():
+            return True
+        return self.parent is not None and self.parent.cancelled()
+
+    def sleep(self, seconds):
+        """
+        Sleeps for the given seconds, at most until the deadline, waking up as soon as the token is set.
+        """
+        seconds = min(seconds, self.remaining())
+        if self.token is not None:
+            self.token.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+
+def current_deadline():
+    """
+    Returns the innermost deadline entered by the current thread, None if there is none.
+    """
+    stack = getattr(_deadlines, 'stack', None)
+    if not stack:
+        return None
+    return stack[-1]
+
+
+@contextmanager
+def within(timeout, token=None):
+    """
+    Runs the block with a deadline of timeout seconds, bounded by the deadline already entered, if any.
+    Waits started in the block, including those in traits of other waits, never run past it. It can also bound a
+    whole test, e.g.
+
+        with within(60):
+            ...
+    :param token: optional cancellation token, e.g. a threading.Event, inherited by the deadlines of the block.
+    """
+    with _entered(Deadline(timeout, current_deadline(), token)) as deadline:
+        yield deadline
+
+
+def deadline_bound(function):
+    """
+    Returns function bound to the current deadline: wherever it is called, e.g. on a worker thread, the waits it starts
+    are bounded by this deadline and cancelled with it. Returns function itself if there is no current deadline.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return function
+
+    def function_within_deadline(*args, **kwargs):
+        with _entered(deadline):
+            return function(*args, **kwargs)
+    return function_within_deadline
+
+
+@contextmanager
+def _entered(deadline):
+    if getattr(_deadlines, 'stack', None) is None:
+        _deadlines.stack = []
+    _deadlines.stack.append(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadlines.stack.pop()
+
+
+def cancellable(token):
+    """
+    Runs the block so that waits started in it raise a WaitCancelledException as soon as the token is set, e.g.
+
+        with cancellable(session_aborted):
+            ...
+
+    where session_aborted is a threading.Event set by another thread.
+    """
+    return within(None, token)
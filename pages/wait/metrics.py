@@ -0,0 +1,258 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+from abc import ABCMeta, abstractmethod
+import io
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException
+
+from pages.exceptions import WaitCancelledException
+from pages.wait.deadline import now
+
+logger = logging.getLogger(__name__)
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_recordings = threading.local()
+
+
+class WaitMetrics(object):
+    """
+    Metrics of a single wait, emitted to the registered sinks when the wait ends.
+    :param kind: what is waited for, 'condition', 'traits', 'elements' or 'browser conditions'.
+    :param name: description of the condition, or name of the element(s).
+    :param element: the ElementWithTraits waited for, None if the wait is not for the traits of a single element.
+    """
+
+    def __init__(self, kind, name, element=None):
+        self.kind = kind
+        self.name = name
+        self.element = element
+        self.start_time = now()
+        self.duration = 0
+        self.polls = 0
+        self.sleep_time = 0
+        self.outcome = None
+        self.traits_first_true = {}  # trait description -> seconds from the start of the wait
+        self.slow_traits = {}  # trait description -> number of evaluations which exceeded the time limit
+
+    @property
+    def condition_time(self):
+        """
+        Time spent evaluating conditions, i.e. not sleeping between polls.
+        """
+        return max(0, self.duration - self.sleep_time)
+
+    def poll(self):
+        self.polls += 1
+
+    def slept(self, seconds):
+        self.sleep_time += seconds
+
+    def trait_true(self, description):
+        if description not in self.traits_first_true:
+            self.traits_first_true[description] = now() - self.start_time
+
+    def trait_slow(self, description):
+        self.slow_traits[description] = self.slow_traits.get(description, 0) + 1
+
+    def as_dict(self):
+        return {'kind': self.kind, 'name': self.name, 'outcome': self.outcome, 'duration': self.duration,
+                'polls': self.polls, 'sleep_time': self.sleep_time, 'condition_time': self.condition_time,
+                'traits_first_true': self.traits_first_true, 'slow_traits': self.slow_traits}
+
+
+class MetricsSink(object):
+    """
+    Receives the WaitMetrics of every wait. Register sinks with add_sink().
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def emit(self, metrics):
+        pass  # pragma: no cover
+
+
+class JSONLinesSink(MetricsSink):
+    """
+    Appends metrics of each wait to a file, one JSON object per line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, metrics):
+        line = json.dumps(metrics.as_dict(), sort_keys=True) + '\n'
+        with self._lock:
+            with open(self.path, 'a') as jsonl_file:
+                jsonl_file.write(line)
+
+
+class PrometheusTextFileSink(MetricsSink):
+    """
+    Aggregates metrics by kind and name of waits and writes them in the Prometheus text format, e.g. for the textfile
+    collector of the node exporter. The file is rewritten after each wait.
+    """
+
+    def __init__(self, path, prefix='pages'):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._waits = {}  # (kind, name, outcome) -> number of waits
+        self._totals = {}  # (kind, name) -> [duration, polls, sleep time, condition time]
+        self._traits = {}  # (name, trait) -> [sum of seconds to first true, count]
+        self._slow_traits = {}  # (name, trait) -> number of evaluations which exceeded the time limit
+
+    def emit(self, metrics):
+        with self._lock:
+            key = (metrics.kind, metrics.name)
+            self._waits[key + (metrics.outcome,)] = self._waits.get(key + (metrics.outcome,), 0) + 1
+            totals = self._totals.setdefault(key, [0, 0, 0, 0])
+            for index, value in enumerate([metrics.duration, metrics.polls, metrics.sleep_time,
+                                           metrics.condition_time]):
+                totals[index] += value
+            for description, seconds in metrics.traits_first_true.items():
+                trait_totals = self._traits.setdefault((metrics.name, description), [0, 0])
+                trait_totals[0] += seconds
+                trait_totals[1] += 1
+            for description, count in metrics.slow_traits.items():
+                key = (metrics.name, description)
+                self._slow_traits[key] = self._slow_traits.get(key, 0) + count
+            self._write(self.to_text())
+
+    def to_text(self):
+        lines = []
+        self._add_metric(lines, 'waits_total', 'Number of waits by outcome.',
+                         [(_labels(kind=kind, name=name, outcome=outcome), count)
+                          for (kind, name, outcome), count in sorted(self._waits.items())])
+        for index, (metric, help_text) in enumerate([('wait_duration_seconds_total', 'Time spent in waits.'),
+                                                     ('wait_polls_total', 'Number of polls of waits.'),
+                                                     ('wait_sleep_seconds_total', 'Time slept between polls.'),
+                                                     ('wait_condition_seconds_total', 'Time spent in conditions.')]):
+            self._add_metric(lines, metric, help_text,
+                             [(_labels(kind=kind, name=name), totals[index])
+                              for (kind, name), totals in sorted(self._totals.items())])
+        for index, (metric, help_text) in enumerate([('trait_first_true_seconds_total',
+                                                      'Time until traits were first true during waits.'),
+                                                     ('trait_first_true_waits_total',
+                                                      'Number of waits during which traits were true.')]):
+            self._add_metric(lines, metric, help_text,
+                             [(_labels(name=name, trait=trait), totals[index])
+                              for (name, trait), totals in sorted(self._traits.items())])
+        self._add_metric(lines, 'trait_time_limit_exceeded_total', 'Evaluations of traits exceeding their time limit.',
+                         [(_labels(name=name, trait=trait), count)
+                          for (name, trait), count in sorted(self._slow_traits.items())])
+        return u'\n'.join(lines) + u'\n'
+
+    def _add_metric(self, lines, metric, help_text, samples):
+        name = self.prefix + '_' + metric
+        lines.append(u'# HELP {0} {1}'.format(name, help_text))
+        lines.append(u'# TYPE {0} counter'.format(name))
+        for labels, value in samples:
+            lines.append(u'{0}{{{1}}} {2}'.format(name, labels, repr(float(value))))
+
+    def _write(self, text):
+        """
+        Writes to a temporary file first, so that the collector never reads a partial file. The text format is UTF-8.
+        """
+        temporary_path = self.path + '.tmp'
+        with io.open(temporary_path, 'w', encoding='utf-8') as text_file:
+            text_file.write(text)
+        os.rename(temporary_path, self.path)
+
+
+def add_sink(sink):
+    """
+    Registers a sink receiving the metrics of every wait. When no sink is registered, metrics are not emitted.
+    """
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        _sinks.remove(sink)
+
+
+def current_metrics():
+    """
+    Returns the metrics of the innermost wait running in the current thread, None if there is none.
+    """
+    stack = getattr(_recordings, 'stack', None)
+    if not stack:
+        return None
+    return stack[-1]
+
+
+@contextmanager
+def recording(kind, name, enter=True, element=None):
+    """
+    Yields the WaitMetrics of a wait running in the block and emits them to the sinks when the block exits.
+    :param enter: False if the metrics should not be returned by current_metrics() while the block runs, e.g. in
+    coroutines, which interleave on the same thread.
+    """
+    metrics = WaitMetrics(kind, name, element)
+    if enter:
+        if getattr(_recordings, 'stack', None) is None:
+            _recordings.stack = []
+        _recordings.stack.append(metrics)
+    try:
+        yield metrics
+        metrics.outcome = 'success'
+    except TimeoutException:
+        metrics.outcome = 'timeout'
+        raise
+    except WaitCancelledException:
+        metrics.outcome = 'cancelled'
+        raise
+    except Exception:
+        metrics.outcome = 'error'
+        raise
+    finally:
+        if enter:
+            _recordings.stack.pop()
+        metrics.duration = now() - metrics.start_time
+        _emit(metrics)
+
+
+def _emit(metrics):
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        try:
+            sink.emit(metrics)
+        except Exception as ex:
+            # %r, so that logging the failure cannot fail too, e.g. on non-ASCII names in Python 2
+            logger.warning("Could not emit metrics of wait %r to %s: %r", metrics.name, sink.__class__.__name__, ex)
+
+
+def _labels(**labels):
+    return u','.join(u'{0}="{1}"'.format(label, _escape(value)) for label, value in sorted(labels.items()))
+
+
+def _escape(value):
+    """
+    Returns the label value as text. Byte strings are decoded as UTF-8, so that non-ASCII names work in Python 2.
+    """
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    return u'{0}'.format(value).replace(u'\\', u'\\\\').replace(u'"', u'\\"').replace(u'\n', u'\\n')
@@ -0,0 +1,114 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+from abc import ABCMeta, abstractmethod
+import random
+from collections import deque
+
+
+class PollStrategy(object):
+    """
+    Decides how long Wait sleeps between two evaluations of a condition.
+    The condition is always evaluated once before the first sleep.
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def delays(self):
+        """
+        Returns an iterator over the delays, in seconds, between consecutive evaluations of the condition.
+        """
+        pass  # pragma: no cover
+
+    def record(self, elapsed):
+        """
+        Called with the time, in seconds, the condition took to become true. It can be used to adapt polling.
+        """
+        pass
+
+
+class FixedPolling(PollStrategy):
+    """
+    Sleeps the same interval between evaluations. This is the default behaviour of Wait.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def delays(self):
+        while True:
+            yield self.interval
+
+
+class BackoffPolling(PollStrategy):
+    """
+    Starts polling quickly and increases the interval exponentially up to a cap.
+    Each delay is randomised by +/- jitter (a fraction of it), so that parallel waits do not poll in lockstep.
+    """
+
+    def __init__(self, initial=0.05, factor=2, maximum=2, jitter=0.1):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def delays(self):
+        delay = self.initial
+        while True:
+            yield delay * (1 + random.uniform(-self.jitter, self.jitter))
+            delay = min(delay * self.factor, self.maximum)
+
+
+class AdaptivePolling(PollStrategy):
+    """
+    Learns how long conditions take to become true.
+    Once load times have been observed, the first sleep lasts until shortly before the median load time, then
+    polling backs off exponentially from a tenth of it. Until then it behaves like BackoffPolling.
+    """
+
+    def __init__(self, initial=0.05, factor=2, maximum=2, jitter=0.1, history=20, anticipation=0.8):
+        """
+        :param history: number of most recent load times taken into account.
+        :param anticipation: fraction of the median load time slept before the second evaluation.
+        """
+        self.backoff = BackoffPolling(initial, factor, maximum, jitter)
+        self.anticipation = anticipation
+        self._load_times = deque(maxlen=history)
+
+    def record(self, elapsed):
+        self._load_times.append(elapsed)
+
+    def expected_load_time(self):
+        """
+        Returns the median of the observed load times, None if none has been observed yet.
+        """
+        if len(self._load_times) == 0:
+            return None
+        load_times = sorted(self._load_times)
+        return load_times[len(load_times) // 2]
+
+    def delays(self):
+        expected = self.expected_load_time()
+        if expected is None or expected == 0:
+            return self.backoff.delays()
+        backoff = BackoffPolling(max(expected / 10.0, self.backoff.initial), self.backoff.factor,
+                                 self.backoff.maximum, self.backoff.jitter)
+        return self._anticipated_delays(expected * self.anticipation, backoff.delays())
+
+    @staticmethod
+    def _anticipated_delays(first_delay, delays):
+        yield first_delay
+        for delay in delays:
+            yield delay
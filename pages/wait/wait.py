@@ -14,10 +14,17 @@
 # limitations under the License.                                           #
 ############################################################################
 import logging
-import time
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from pages.browser_conditions import WAIT_FOR_CONDITIONS_SCRIPT, failing_conditions
+from pages.exceptions import IllegalStateException, FailureTraitException, WaitCancelledException
+from pages.timeline import span
+from pages.wait.deadline import Deadline, within, current_deadline, now
+from pages.wait.metrics import recording
+from pages.wait.poll_strategies import FixedPolling
+
 POLL_FREQUENCY = 0.5
+SCRIPT_TIMEOUT_MARGIN = 5  # seconds given to the browser on top of the timeout to return from an asynchronous script
 IGNORED_EXCEPTIONS = [NoSuchElementException]  # list of exceptions ignored during calls to the method
 LAZY_EVALUATION = True  # Determines if traits should be all evaluated before returning.
 
@@ -33,10 +40,13 @@ class Wait(object):
         - until_traits_are_present() which is
     """
 
-    def __init__(self, timeout, poll_frequency=POLL_FREQUENCY, ignored_exceptions=None, logger=None):
+    def __init__(self, timeout, poll_frequency=POLL_FREQUENCY, ignored_exceptions=None, logger=None,
+                 poll_strategy=None):
         self._timeout = timeout
         self._poll = poll_frequency
+        self._poll_strategy = poll_strategy
         self._driver = None
+        self._token = None
 
         # avoid the divide by zero
         if self._poll == 0:
@@ -52,59 +62,183 @@ class Wait(object):
     def until_condition(self, condition, condition_description):
         """
         Waits until conditions is True or returns a non-None value.
+        The condition is evaluated a last time when the timeout expires. Waits started by the condition never run past
+        the timeout of this one, which itself never runs past the deadline of an outer wait (see pages.wait.deadline).
         If any of the trait is still not present after timeout, raises a TimeoutException.
         """
-        end_time = time.time() + self._timeout
-        count = 1
-        while True:
-            try:
-                if not hasattr(condition, '__call__'):
-                    raise TypeError("condition is not callable")
-                value = condition()
-                if type(value) is bool and value is not False:
-                    return value
-                elif type(value) is not bool and value is not None:
-                    return value
-                else:
-                    logger.debug("#" + str(count) + " - wait until " + condition_description)  # pragma: no cover
-            except self._ignored_exceptions as ex:
-                logger.debug("Captured {0} : {1}".format(str(ex.__class__).replace("<type '", "").replace("'>", ""),
-                                                         str(ex)))  # pragma: no cover
-            time.sleep(self._poll)
-            count += 1
-            if time.time() > end_time:  # pragma: no cover
-                break
-        raise TimeoutException(
-            msg="condition <" + condition_description + "> was not true after " + str(self._timeout) + " seconds.")
+        with within(self._timeout, self._token) as deadline, recording('condition', condition_description) as metrics:
+            delays = self._delays()
+            count = 1
+            while True:
+                self._raise_if_cancelled(deadline, condition_description)
+                metrics.poll()
+                try:
+                    if not hasattr(condition, '__call__'):
+                        raise TypeError("condition is not callable")
+                    value = self._evaluate(condition, condition_description, count)
+                    if type(value) is bool and value is not False:
+                        self._record(deadline)
+                        return value
+                    elif type(value) is not bool and value is not None:
+                        self._record(deadline)
+                        return value
+                    else:
+                        logger.debug("#" + str(count) + " - wait until " + condition_description)  # pragma: no cover
+                except self._ignored_exceptions as ex:
+                    logger.debug("Captured {0} : {1}".format(
+                        str(ex.__class__).replace("<type '", "").replace("'>", ""), str(ex)))  # pragma: no cover
+                if deadline.expired():
+                    break
+                self._sleep(next(delays), deadline, metrics)
+                count += 1
+            raise TimeoutException(
+                msg="condition <" + condition_description + "> was not true after " + str(deadline.timeout) +
+                    " seconds.")
 
     def until_traits_are_present(self, element_with_traits):
         """
         Waits until all traits are present.
         If any of the traits is still not present after timeout, raises a TimeoutException.
+        If any of the failure traits is detected while traits are not present, raises a FailureTraitException.
         """
-        end_time = time.time() + self._timeout
-        count = 1
-        missing_traits_descriptions = None
-        while True:
-            missing_traits_descriptions = []
-            try:
-                missing_traits_descriptions = element_with_traits.evaluate_traits()
-                if len(missing_traits_descriptions) == 0:
+        with within(self._timeout, self._token) as deadline, \
+                recording('traits', element_with_traits.name, element=element_with_traits) as metrics:
+            delays = self._delays()
+            count = 1
+            missing_traits_descriptions = None
+            while True:
+                self._raise_if_cancelled(deadline, element_with_traits.name)
+                metrics.poll()
+                missing_traits_descriptions = []
+                try:
+                    missing_traits_descriptions = self._evaluate(element_with_traits.evaluate_traits,
+                                                                 element_with_traits.name, count)
+                    if len(missing_traits_descriptions) == 0:
+                        self._record(deadline)
+                        return True
+                    else:
+                        self._raise_on_failure_traits(element_with_traits)
+                        logger.debug("#{0} - wait until all traits are present: <{1}>".format(str(count), '> <'.join(
+                            missing_traits_descriptions)))
+                except self._ignored_exceptions as ex:  # pragma: no cover
+                    logger.debug("Captured {0}: {1}".format(
+                        str(ex.__class__).replace("<type '", "").replace("'>", ""), str(ex)))  # pragma: no cover
+                    pass  # pragma: no cover
+                if deadline.expired():
+                    break
+                self._sleep(next(delays), deadline, metrics)
+                count += 1
+            raise TimeoutException(
+                msg="conditions " + '<' + '> <'.join(missing_traits_descriptions) + '>' + " not true after " + str(
+                    deadline.timeout) + " seconds.")
+
+    def until_all_loaded(self, *elements_with_traits):
+        """
+        Waits until all traits of all the elements are present, polling them in a single loop with one timeout.
+        Elements whose traits have all been present are not evaluated again.
+        If any of the elements is still not loaded after timeout, raises a TimeoutException listing, for each of them,
+        the traits which are not present. If failure traits of any of the elements are detected, raises a
+        FailureTraitException.
+        """
+        self._until_loaded(elements_with_traits, len(elements_with_traits))
+        return True
+
+    def until_any_loaded(self, *elements_with_traits):
+        """
+        Waits until all traits of any of the elements are present, polling them in a single loop with one timeout.
+        Returns the first element found loaded. If none is loaded after timeout, raises a TimeoutException.
+        """
+        return self._until_loaded(elements_with_traits, 1)[0]
+
+    def _until_loaded(self, elements_with_traits, required):
+        """
+        Polls traits of elements until the required number of them is loaded and returns the loaded elements.
+        """
+        if len(elements_with_traits) == 0:
+            raise IllegalStateException("There are no elements to wait for")
+        for element in elements_with_traits:
+            if len(element.traits) == 0:
+                raise IllegalStateException("Element '{0}' has no traits".format(element.name))
+        names = ', '.join([element.name for element in elements_with_traits])
+        with within(self._timeout, self._token) as deadline, recording('elements', names) as metrics:
+            delays = self._delays()
+            count = 1
+            loaded = []
+            missing_traits = {}
+            while True:
+                self._raise_if_cancelled(deadline, names)
+                metrics.poll()
+                for element in elements_with_traits:
+                    if element in loaded:
+                        continue
+                    try:
+                        missing_traits[element] = self._evaluate(element.evaluate_traits, element.name, count)
+                        if len(missing_traits[element]) > 0:
+                            self._raise_on_failure_traits(element)
+                    except self._ignored_exceptions as ex:
+                        missing_traits[element] = ["{0}: {1}".format(ex.__class__.__name__, str(ex))]
+                    if len(missing_traits[element]) == 0:
+                        loaded.append(element)
+                        if len(loaded) == required:
+                            self._record(deadline)
+                            return loaded
+                logger.debug("#{0} - wait until {1} of {2} elements are loaded".format(
+                    str(count), str(required), str(len(elements_with_traits))))
+                if deadline.expired():
+                    break
+                self._sleep(next(delays), deadline, metrics)
+                count += 1
+            raise TimeoutException(
+                msg="elements not loaded after " + str(deadline.timeout) + " seconds: " + ', '.join(
+                    [element.name + ' <' + '> <'.join(missing_traits[element]) + '>'
+                     for element in elements_with_traits if element not in loaded]))
+
+    def until_browser_conditions(self, conditions, descriptions):
+        """
+        Waits until all BrowserCondition(s) are true without polling from Python.
+        A single asynchronous script returns as soon as all conditions hold in the browser, or after timeout.
+        The driver is the one set through with_driver(), the one of the first condition otherwise. Its script timeout
+        is set to the timeout of the wait plus a margin while waiting, then restored. Drivers which cannot tell their
+        script timeout (before Selenium 4) would lose the one set by tests: their conditions are polled instead, all
+        evaluated with one script call per poll. So are those of cancellable waits (see with_cancellation()), as the
+        browser cannot be told to stop waiting when the token is set.
+        If any of the conditions is still not true after timeout, raises a TimeoutException.
+        """
+        driver = self._driver if self._driver is not None else conditions[0].driver
+        deadline = Deadline(self._timeout, current_deadline(), self._token)
+        self._raise_if_cancelled(deadline, ', '.join(descriptions))
+        timeout = deadline.timeout
+        script_timeout = getattr(getattr(driver, 'timeouts', None), 'script', None)
+        if script_timeout is None or deadline.token is not None:
+            return self._poll_browser_conditions(driver, conditions, descriptions, timeout)
+        driver.set_script_timeout(timeout + SCRIPT_TIMEOUT_MARGIN)
+        try:
+            with recording('browser conditions', ', '.join(descriptions)) as metrics:
+                metrics.poll()
+                failing = driver.execute_async_script(WAIT_FOR_CONDITIONS_SCRIPT,
+                                                      [condition.specification for condition in conditions], timeout)
+                if len(failing) == 0:
                     return True
-                else:
-                    logger.debug("#{0} - wait until all traits are present: <{1}>".format(str(count), '> <'.join(
-                        missing_traits_descriptions)))
-            except self._ignored_exceptions as ex:  # pragma: no cover
-                logger.debug("Captured {0}: {1}".format(str(ex.__class__).replace("<type '", "").replace("'>", ""),
-                                                        str(ex)))  # pragma: no cover
-                pass  # pragma: no cover
-            time.sleep(self._poll)
-            count += 1
-            if time.time() > end_time:
-                break
-        raise TimeoutException(
-            msg="conditions " + '<' + '> <'.join(missing_traits_descriptions) + '>' + " not true after " + str(
-                self._timeout) + " seconds.")
+                raise TimeoutException(
+                    msg="conditions " + '<' + '> <'.join([descriptions[index] for index in failing]) + '>' +
+                        " not true after " + str(timeout) + " seconds.")
+        finally:
+            driver.set_script_timeout(script_timeout)
+
+    def _poll_browser_conditions(self, driver, conditions, descriptions, timeout):
+        failing = []
+
+        def all_conditions_hold():
+            failing[:] = failing_conditions(driver, conditions)
+            return len(failing) == 0
+
+        try:
+            return self.until_condition(all_conditions_hold, ', '.join(descriptions))
+        except TimeoutException:
+            raise TimeoutException(
+                msg="conditions " + '<' + '> <'.join([descriptions[conditions.index(condition)]
+                                                      for condition in failing]) + '>' +
+                    " not true after " + str(timeout) + " seconds.")
 
     def with_timeout(self, timeout):
         """
@@ -120,6 +254,14 @@ class Wait(object):
         self._poll = poll_interval
         return self
 
+    def with_poll_strategy(self, poll_strategy):
+        """
+        Set the strategy deciding how long to sleep between evaluations. See pages.wait.poll_strategies.
+        When no strategy is set, the poll interval is slept between evaluations.
+        """
+        self._poll_strategy = poll_strategy
+        return self
+
     def with_ignored_exceptions(self, *ignored_exceptions):
         """
         Set a list of exceptions that should be ignored inside the wait loop.
@@ -128,11 +270,52 @@ class Wait(object):
             self._ignored_exceptions = self._ignored_exceptions + (exception,)
         return self
 
+    def with_cancellation(self, token):
+        """
+        Set a cancellation token, an object like threading.Event: the wait raises a WaitCancelledException as soon as
+        it is set. Without a token, the wait uses the one of the enclosing deadline, if any (see pages.wait.deadline).
+        """
+        self._token = token
+        return self
+
     def with_driver(self, driver):
         self._driver = driver
         return self
 
+    @staticmethod
+    def _raise_on_failure_traits(element_with_traits):
+        failure_traits = element_with_traits.detect_failure_traits()
+        if len(failure_traits) > 0:
+            raise FailureTraitException("{0} failed to load: <{1}>".format(element_with_traits.name,
+                                                                           '> <'.join(failure_traits)))
+
+    def _delays(self):
+        if self._poll_strategy is None:
+            return FixedPolling(self._poll).delays()
+        return self._poll_strategy.delays()
+
+    @staticmethod
+    def _evaluate(evaluate, description, count):
+        with span('poll #' + str(count), 'poll', wait=description):
+            return evaluate()
+
+    @staticmethod
+    def _sleep(delay, deadline, metrics):
+        start_time = now()
+        with span('sleep', 'sleep'):
+            deadline.sleep(delay)
+        metrics.slept(now() - start_time)
+
+    @staticmethod
+    def _raise_if_cancelled(deadline, description):
+        if deadline.cancelled():
+            raise WaitCancelledException("wait for <{0}> was cancelled".format(description))
+
+    def _record(self, deadline):
+        if self._poll_strategy is not None:
+            self._poll_strategy.record(deadline.elapsed())
+
 
 class Repeat(Wait):
-    def __init__(self, timeout, poll_frequency=POLL_FREQUENCY, ignored_exceptions=None):
-        Wait.__init__(self, timeout, poll_frequency, ignored_exceptions)
+    def __init__(self, timeout, poll_frequency=POLL_FREQUENCY, ignored_exceptions=None, poll_strategy=None):
+        Wait.__init__(self, timeout, poll_frequency, ignored_exceptions, poll_strategy=poll_strategy)
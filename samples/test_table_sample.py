@@ -44,6 +44,12 @@ class SampleTableTest(unittest.TestCase):
 
         assert_that(first_table_row_values, equal_to(EXPECTED_LABEL_LIST))
 
+    def test_can_read_table_data(self):
+        sample_page = SamplePage(self.driver).load().wait_until_loaded()
+        table_data = sample_page.read_table_data()
+
+        assert_that(table_data[0], equal_to(EXPECTED_LABEL_LIST))
+
 
 class SamplePage(Page):
 
@@ -59,6 +65,9 @@ class SamplePage(Page):
         table_rows = SampleTable(self.driver).get_items()
         return [i for i in table_rows[0].values()]
 
+    def read_table_data(self):
+        return SampleTable(self.driver).get_rows_data([By.XPATH, './td'])
+
 
 class SampleTable(Table):
 
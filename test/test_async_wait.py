@@ -0,0 +1,126 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import sys
+import time
+import unittest
+
+from hamcrest import equal_to, assert_that, raises, calling, less_than
+from selenium.common.exceptions import TimeoutException
+
+from pages.element_with_traits import ElementWithTraits
+from pages.exceptions import WaitCancelledException
+
+# coroutine functions cannot be written with Python 2 syntax
+COROUTINES = """
+import asyncio
+
+async def results_loaded(results):
+    await asyncio.sleep(0)
+    return len(results) > 0
+"""
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "asyncio waits require Python 3.5")
+class AsyncWaitTest(unittest.TestCase):
+    def setUp(self):
+        import asyncio
+        from pages.wait import async_wait
+        self.asyncio = asyncio
+        self.async_wait = async_wait
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.coroutines = {}
+        exec(COROUTINES, self.coroutines)
+
+    def tearDown(self):
+        self.asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def run_until_complete(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_can_wait_until_condition(self):
+        values = iter([None, False, 'value'])
+        wait = self.async_wait.AsyncWait(1, 0.01)
+
+        assert_that(self.run_until_complete(wait.until_condition(lambda: next(values), 'value is set')),
+                    equal_to('value'))
+
+    def test_awaits_conditions_returning_awaitables(self):
+        wait = self.async_wait.AsyncWait(1, 0.01)
+
+        assert_that(self.run_until_complete(
+            wait.until_condition(lambda: self.asyncio.sleep(0, result=True), 'awaitable is true')), equal_to(True))
+
+    def test_raises_timeout_when_condition_is_not_true(self):
+        wait = self.async_wait.AsyncWait(0.1, 0.01)
+
+        assert_that(calling(self.run_until_complete).with_args(wait.until_condition(lambda: False, 'never true')),
+                    raises(TimeoutException, "condition <never true> was not true after 0.1 seconds."))
+
+    def test_waits_concurrently_on_one_thread(self):
+        elements = [self.element_with_results(after=0.2) for _ in range(5)]
+        ##
+        start_time = time.time()
+        self.run_until_complete(self.asyncio.gather(
+            *[self.async_wait.wait_until_loaded(element, timeout=1, polling_time=0.05) for element in elements]))
+        ##
+        assert_that(time.time() - start_time, less_than(0.5))
+
+    def test_can_wait_until_loaded_with_coroutine_traits(self):
+        results = []
+        element = ElementWithTraits('an element')
+        element.add_trait(lambda: self.coroutines['results_loaded'](results), 'results loaded (awaitable)')
+        element.add_trait(self.coroutines['results_loaded'].__get__(results), 'results loaded (coroutine)')
+        self.loop.call_later(0.1, results.append, 'result')
+        ##
+        loaded = self.run_until_complete(self.async_wait.wait_until_loaded(element, timeout=1, polling_time=0.01))
+        ##
+        assert_that(loaded, equal_to(element))
+
+    def test_runs_conditions_in_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        element = self.element_with_results(after=0.1)
+        with ThreadPoolExecutor(2) as executor:
+            ##
+            loaded = self.run_until_complete(self.async_wait.wait_until_loaded(element, timeout=1, polling_time=0.01,
+                                                                               executor=executor))
+        ##
+        assert_that(loaded, equal_to(element))
+
+    def test_raises_timeout_when_traits_do_not_load(self):
+        element = ElementWithTraits('an element').add_trait(lambda: False, 'never true')
+
+        assert_that(calling(self.run_until_complete).with_args(
+            self.async_wait.wait_until_loaded(element, timeout=0.1, polling_time=0.01)),
+            raises(TimeoutException, "conditions <never true> not true after 0.1 seconds."))
+
+    def test_wait_stops_when_cancellation_token_is_set(self):
+        token = self.asyncio.Event()
+        element = ElementWithTraits('an element').add_trait(lambda: False, 'never true')
+        self.loop.call_later(0.1, token.set)
+        ##
+        start_time = time.time()
+        assert_that(calling(self.run_until_complete).with_args(
+            self.async_wait.wait_until_loaded(element, timeout=30, polling_time=10, cancellation_token=token)),
+            raises(WaitCancelledException))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+
+    @staticmethod
+    def element_with_results(after):
+        loaded_at = time.time() + after
+        return ElementWithTraits('an element').add_trait(lambda: time.time() > loaded_at, 'results loaded')
@@ -0,0 +1,181 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import threading
+import time
+import unittest
+
+from hamcrest import assert_that, equal_to, calling, raises, less_than
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from pages.browser_conditions import element_present, element_visible, text_matches, count_at_least, \
+    element_enabled, text_equals, attribute_equals, child_count_at_least, FAILING_CONDITIONS_SCRIPT
+from pages.element_with_traits import ElementWithTraits
+from pages.exceptions import WaitCancelledException
+from pages.wait.deadline import cancellable
+from pages.wait.wait import Wait, SCRIPT_TIMEOUT_MARGIN
+from test.utils.mocks import MockedWebDriver
+
+
+class BrowserConditionsTest(unittest.TestCase):
+    """
+    Unit test for browser conditions.
+    """
+
+    def setUp(self):
+        self.driver = MockedWebDriver()
+
+    def test_condition_is_evaluated_by_the_browser(self):
+        self.driver.set_script_result([])
+        self.driver.set_script_result([0])
+        condition = text_matches(self.driver, [By.ID, 'title'], '^Results')
+        ##
+        assert_that([condition(), condition()], equal_to([True, False]))
+        assert_that(self.driver.get_executed_scripts()[0]['args'],
+                    equal_to([[{'type': 'text_matches', 'by': By.ID, 'value': 'title', 'pattern': '^Results'}]]))
+
+    def test_condition_needs_locator_resolvable_by_the_browser(self):
+        assert_that(calling(element_present).with_args(self.driver, [By.LINK_TEXT, 'a link']), raises(ValueError))
+
+    def test_traits_are_evaluated_with_one_script(self):
+        self.driver.set_script_result([1])
+        element = ElementWithTraits('an element')
+        element.with_eager_evaluation()
+        element.add_trait(element_enabled(self.driver, [By.ID, 'submit']), 'submit is enabled')
+        element.add_trait(lambda: False, 'python trait')
+        element.add_trait(text_equals(self.driver, [By.ID, 'title'], 'Results'), 'has title')
+        element.add_trait(attribute_equals(self.driver, [By.ID, 'grid'], 'aria-busy', 'false'), 'grid is loaded')
+        element.add_trait(child_count_at_least(self.driver, [By.ID, 'grid'], 10), 'grid has rows')
+        ##
+        missing_traits = element.evaluate_traits()
+        ##
+        assert_that(missing_traits, equal_to(['python trait', 'has title']))
+        assert_that(len(self.driver.get_executed_scripts()), equal_to(1), "browser traits should be evaluated together")
+        assert_that([condition['type'] for condition in self.driver.get_executed_scripts()[0]['args'][0]],
+                    equal_to(['enabled', 'text_equals', 'attribute_equals', 'child_count_at_least']))
+
+    def test_lazy_evaluation_returns_first_failing_trait(self):
+        self.driver.set_script_result([1])
+        element = ElementWithTraits('an element')
+        element.add_trait(element_present(self.driver, [By.ID, 'header']), 'has header')
+        element.add_trait(lambda: True, 'python trait')
+        element.add_trait(element_visible(self.driver, [By.ID, 'results']), 'has results')
+        ##
+        assert_that(element.evaluate_traits(), equal_to(['has results']))
+
+    def test_wait_until_browser_conditions(self):
+        self.driver.timeouts = Timeouts(script=30)
+        self.driver.set_script_result([])
+        conditions = [element_present(self.driver, [By.ID, 'header']), count_at_least(self.driver, [By.ID, 'r'], 3)]
+        ##
+        assert_that(Wait(2).until_browser_conditions(conditions, ['has header', 'has results']), equal_to(True))
+        assert_that(self.driver.get_executed_scripts()[0]['args'][1], equal_to(2))
+
+    def test_wait_until_browser_conditions_times_out(self):
+        self.driver.timeouts = Timeouts(script=30)
+        self.driver.set_script_result([1])
+        conditions = [element_present(self.driver, [By.ID, 'header']), element_visible(self.driver, [By.ID, 'r'])]
+        ##
+        assert_that(calling(Wait(1).until_browser_conditions).with_args(conditions, ['has header', 'has results']),
+                    raises(TimeoutException, 'has results'))
+
+    def test_script_timeout_is_restored_after_waiting_in_the_browser(self):
+        self.driver.set_script_result([0])
+        script_timeouts = []
+        self.driver.set_script_timeout = script_timeouts.append
+        self.driver.timeouts = Timeouts(script=12)
+        conditions = [element_present(self.driver, [By.ID, 'header'])]
+        ##
+        assert_that(calling(Wait(1).until_browser_conditions).with_args(conditions, ['has header']),
+                    raises(TimeoutException))
+        ##
+        assert_that(script_timeouts, equal_to([1 + SCRIPT_TIMEOUT_MARGIN, 12]))
+
+    def test_conditions_are_polled_when_driver_cannot_tell_script_timeout(self):
+        self.driver.set_script_result([0])
+        self.driver.set_script_result([])
+        script_timeouts = []
+        self.driver.set_script_timeout = script_timeouts.append
+        ##
+        Wait(1, 0.01).until_browser_conditions([element_present(self.driver, [By.ID, 'header'])], ['has header'])
+        ##
+        assert_that(script_timeouts, equal_to([]), "script timeout set by tests should be kept")
+        assert_that([script['script'] for script in self.driver.get_executed_scripts()],
+                    equal_to([FAILING_CONDITIONS_SCRIPT, FAILING_CONDITIONS_SCRIPT]))
+
+    def test_polled_conditions_time_out(self):
+        for _ in range(100):
+            self.driver.set_script_result([0])
+        conditions = [element_present(self.driver, [By.ID, 'header'])]
+        ##
+        assert_that(calling(Wait(0.05, 0.01).until_browser_conditions).with_args(conditions, ['has header']),
+                    raises(TimeoutException, 'conditions <has header> not true after 0.05 seconds'))
+
+    def test_cancellable_wait_polls_conditions_and_stops_when_cancelled(self):
+        self.driver.timeouts = Timeouts(script=30)
+        token = threading.Event()
+        self.driver.set_script_result([0])
+        self.driver.set_script_result(lambda script, args: token.set() or [0])
+        conditions = [element_present(self.driver, [By.ID, 'header'])]
+        ##
+        start_time = time.time()
+        assert_that(calling(Wait(5, 0.01).with_cancellation(token).until_browser_conditions)
+                    .with_args(conditions, ['has header']), raises(WaitCancelledException))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+        assert_that([script['script'] for script in self.driver.get_executed_scripts()],
+                    equal_to([FAILING_CONDITIONS_SCRIPT, FAILING_CONDITIONS_SCRIPT]))
+
+    def test_conditions_are_polled_in_cancellable_blocks(self):
+        self.driver.timeouts = Timeouts(script=30)
+        self.driver.set_script_result([])
+        ##
+        with cancellable(threading.Event()):
+            Wait(5).until_browser_conditions([element_present(self.driver, [By.ID, 'header'])], ['has header'])
+        ##
+        assert_that(self.driver.get_executed_scripts()[0]['script'], equal_to(FAILING_CONDITIONS_SCRIPT))
+
+    def test_event_driven_wait_until_loaded_does_not_poll_browser_traits(self):
+        self.driver.timeouts = Timeouts(script=30)
+        self.driver.set_script_result([])
+        element = ElementWithTraits('an element').with_event_driven_wait()
+        element.add_trait(element_present(self.driver, [By.ID, 'header']), 'has header')
+        element.add_trait(element_visible(self.driver, [By.ID, 'results']), 'has results')
+        ##
+        element.wait_until_loaded(5, 1)
+        ##
+        assert_that(len(self.driver.get_executed_scripts()), equal_to(1), "traits should be waited with one script")
+
+    def test_event_driven_wait_until_loaded_polls_other_traits(self):
+        self.driver.timeouts = Timeouts(script=30)
+        self.driver.set_script_result([])
+        self.driver.set_script_result([])
+        python_trait_evaluations = []
+        element = ElementWithTraits('an element').with_event_driven_wait()
+        element.add_trait(element_present(self.driver, [By.ID, 'header']), 'has header')
+        element.add_trait(lambda: python_trait_evaluations.append(True) or True, 'python trait')
+        ##
+        element.wait_until_loaded(5, 1)
+        ##
+        assert_that(len(python_trait_evaluations), equal_to(1))
+
+
+class Timeouts(object):
+    """
+    Timeouts of a driver, as told by Selenium 4 and later.
+    """
+    def __init__(self, script):
+        self.script = script
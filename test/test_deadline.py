@@ -0,0 +1,72 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import threading
+import unittest
+
+from hamcrest import equal_to, assert_that, less_than_or_equal_to, none
+
+from pages.wait.deadline import Deadline, within, current_deadline, deadline_bound
+
+
+class DeadlineTest(unittest.TestCase):
+    def test_deadline_does_not_end_after_parent(self):
+        parent = Deadline(1)
+        deadline = Deadline(10, parent)
+        assert_that(deadline.end_time, equal_to(parent.end_time))
+        assert_that(deadline.timeout, less_than_or_equal_to(1))
+
+    def test_deadline_can_end_before_parent(self):
+        deadline = Deadline(1, Deadline(10))
+        assert_that(deadline.timeout, equal_to(1))
+
+    def test_remaining_is_never_negative(self):
+        deadline = Deadline(0)
+        assert_that(deadline.expired(), equal_to(True))
+        assert_that(deadline.remaining(), equal_to(0))
+
+    def test_nested_deadlines_are_bounded_by_outer_ones(self):
+        assert_that(current_deadline(), none())
+        with within(1) as outer:
+            with within(10) as inner:
+                assert_that(current_deadline(), equal_to(inner))
+                assert_that(inner.end_time, equal_to(outer.end_time))
+            assert_that(current_deadline(), equal_to(outer))
+        assert_that(current_deadline(), none())
+
+    def test_deadlines_inherit_cancellation(self):
+        token = threading.Event()
+        with within(None, token):
+            with within(10, threading.Event()) as inner:
+                assert_that(inner.cancelled(), equal_to(False))
+                token.set()
+                assert_that(inner.cancelled(), equal_to(True))
+
+    def test_deadlines_are_per_thread(self):
+        deadlines = []
+        with within(1):
+            thread = threading.Thread(target=lambda: deadlines.append(current_deadline()))
+            thread.start()
+            thread.join()
+        assert_that(deadlines, equal_to([None]))
+
+    def test_functions_bound_to_deadline_run_within_it_on_other_threads(self):
+        deadlines = []
+        with within(1) as deadline:
+            function = deadline_bound(lambda: deadlines.append(current_deadline()))
+            thread = threading.Thread(target=function)
+            thread.start()
+            thread.join()
+        assert_that(deadlines, equal_to([deadline]))
@@ -13,13 +13,18 @@
 # See the License for the specific language governing permissions and      #
 # limitations under the License.                                           #
 ############################################################################
+import threading
+import time
 import unittest
 
-from hamcrest import equal_to, assert_that, raises, calling
-from selenium.common.exceptions import TimeoutException
+from hamcrest import equal_to, assert_that, raises, calling, close_to, less_than
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from pages.element_with_traits import ElementWithTraits
-from pages.exceptions import IllegalStateException
+from pages.exceptions import IllegalStateException, FailureTraitException
+from pages.wait.poll_strategies import AdaptivePolling
+from pages.wait.wait import Wait
+from test.utils.mocks import MockedWebDriver
 
 
 class ElementWithTraitsTest(unittest.TestCase):
@@ -35,6 +40,12 @@ class ElementWithTraitsTest(unittest.TestCase):
         element = ElementWithTraits('an_element').add_trait(lambda: False, 'never loading')
         assert_that(calling(element.wait_until_loaded).with_args(1, 0.5), raises(TimeoutException))
 
+    def test_can_wait_with_poll_strategy(self):
+        strategy = AdaptivePolling()
+        element = ElementWithTraits('an_element').add_trait(lambda: True, 'always present')
+        element.wait_until_loaded(5, 1, poll_strategy=strategy)
+        assert_that(strategy.expected_load_time(), close_to(0, 0.1))
+
     def test_raises_exception_when_there_are_no_traits(self):
         element = ElementWithTraits('an_element')
         assert_that(calling(element.wait_until_loaded).with_args(1, 0.5),
@@ -50,6 +61,165 @@ class ElementWithTraitsTest(unittest.TestCase):
 
         assert_that(element.evaluate_traits(), equal_to(['never true #1', 'never true #2']))
 
+    def test_parallel_evaluation_takes_as_long_as_slowest_trait(self):
+        element = ElementWithTraits('an element').with_parallel_evaluation(max_workers=4)
+        for index in range(4):
+            element.add_trait(lambda: time.sleep(0.2) or True, 'slow trait #{0}'.format(index))
+        ##
+        start_time = time.time()
+        missing_traits = element.evaluate_traits()
+        ##
+        assert_that(missing_traits, equal_to([]))
+        assert_that(time.time() - start_time, less_than(0.6))
+
+    def test_parallel_lazy_evaluation(self):
+        element = get_element_with_traits_and_lazy_evaluation(True).with_parallel_evaluation()
+
+        assert_that(element.evaluate_traits(), equal_to(['never true #1']))
+
+    def test_parallel_eager_evaluation(self):
+        element = get_element_with_traits_and_lazy_evaluation(False).with_parallel_evaluation()
+
+        assert_that(element.evaluate_traits(), equal_to(['never true #1', 'never true #2']))
+
+    def test_parallel_evaluation_raises_exceptions_of_traits(self):
+        element = ElementWithTraits('an element').with_parallel_evaluation()
+        element.add_trait(lambda: True, 'always true')
+        element.add_trait(raise_exception, 'raises exception')
+
+        assert_that(calling(element.evaluate_traits), raises(NoSuchElementException))
+
+    def test_nested_parallel_evaluation_does_not_deadlock(self):
+        inner = ElementWithTraits('inner').with_parallel_evaluation(2)
+        inner.add_trait(lambda: True, 'always true #1')
+        inner.add_trait(lambda: True, 'always true #2')
+        outer = ElementWithTraits('outer').with_parallel_evaluation(2)
+        outer.add_trait(inner.has_all_traits, 'inner loaded #1')
+        outer.add_trait(inner.has_all_traits, 'inner loaded #2')
+        missing_traits = []
+        ##
+        evaluation = threading.Thread(target=lambda: missing_traits.append(outer.evaluate_traits()))
+        evaluation.daemon = True
+        evaluation.start()
+        evaluation.join(5)
+        ##
+        assert_that(missing_traits, equal_to([[]]), "nested evaluation should not wait for its own pool")
+
+    def test_waits_in_traits_evaluated_in_parallel_do_not_outlive_wait_until_loaded(self):
+        element = ElementWithTraits('an element').with_parallel_evaluation(2)
+        element.add_trait(lambda: Wait(3, 0.05).until_condition(lambda: False, 'never true'), 'nested wait')
+        element.add_trait(lambda: True, 'always true')
+        ##
+        start_time = time.time()
+        assert_that(calling(element.wait_until_loaded).with_args(0.5, 0.05), raises(TimeoutException))
+        ##
+        assert_that(time.time() - start_time, less_than(1.5))
+
+    def test_traits_are_evaluated_sequentially_when_driver_keeps_connection_alive(self):
+        element = ElementWithTraits('an element').with_parallel_evaluation(2)
+        element.driver = MockedWebDriver()
+        element.driver.command_executor.keep_alive = True
+        threads = set()
+        for index in range(2):
+            element.add_trait(lambda: threads.add(threading.current_thread()) or True, 'trait #{0}'.format(index))
+        ##
+        element.evaluate_traits()
+        ##
+        assert_that(threads, equal_to(set([threading.current_thread()])))
+
+    def test_adaptive_trait_order_evaluates_failing_traits_first(self):
+        element = ElementWithAdaptiveOrder()
+        assert_that(element.learned_trait_order(), equal_to(['logo present', 'results loaded']))
+        ##
+        element.evaluate_traits()
+        element.evaluate_traits()
+        ##
+        assert_that(ElementWithAdaptiveOrder().learned_trait_order(), equal_to(['results loaded', 'logo present']),
+                    "order should be learned by the class")
+        assert_that(element.get_trait_statistics().get('results loaded')['failures'], equal_to(2))
+        assert_that(element.get_trait_statistics().get('logo present')['evaluations'], equal_to(1),
+                    "once failing trait is evaluated first, other traits should not be evaluated")
+
+    def test_sticky_traits_are_not_evaluated_again_while_waiting(self):
+        header = CountingCondition([True])
+        results = CountingCondition([False, False, True])
+        element = ElementWithTraits('an element')
+        element.add_trait(header, 'header rendered', sticky=True)
+        element.add_trait(results, 'results loaded')
+        ##
+        element.wait_until_loaded(timeout=1, polling_time=0.01)
+        ##
+        assert_that(header.calls, equal_to(1))
+        assert_that(results.calls, equal_to(3))
+
+    def test_non_sticky_traits_are_confirmed_when_all_traits_are_true(self):
+        spinner_hidden = CountingCondition([True, False, True])
+        results = CountingCondition([False, True, True])
+        element = ElementWithTraits('an element')
+        element.add_trait(spinner_hidden, 'spinner hidden')
+        element.add_trait(results, 'results loaded', sticky=True)
+        ##
+        element.wait_until_loaded(timeout=1, polling_time=0.01)
+        ##
+        assert_that(spinner_hidden.calls, equal_to(3), "regressed trait should be evaluated until true again")
+        assert_that(results.calls, equal_to(2))
+        assert_that(element.evaluate_traits(), equal_to([]))
+        assert_that(spinner_hidden.calls, equal_to(4), "traits should be evaluated again after the wait")
+
+    def test_wait_stops_when_failure_trait_is_detected(self):
+        element = ElementWithTraits('results page').add_trait(lambda: False, 'has results')
+        element.add_failure_trait(lambda: True, 'error banner displayed')
+        element.add_failure_trait(raise_exception, 'redirected to login')
+        ##
+        start_time = time.time()
+        assert_that(calling(element.wait_until_loaded).with_args(timeout=5, polling_time=0.01),
+                    raises(FailureTraitException, "results page failed to load: <error banner displayed>"))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+
+    def test_failure_traits_are_not_evaluated_when_traits_are_present(self):
+        failure = CountingCondition([True])
+        element = ElementWithTraits('results page').add_trait(lambda: True, 'has results')
+        element.add_failure_trait(failure, 'error banner displayed')
+        ##
+        element.wait_until_loaded(timeout=1, polling_time=0.01)
+        ##
+        assert_that(failure.calls, equal_to(0))
+
+    def test_wait_keeps_to_timeout_when_trait_hangs(self):
+        released = threading.Event()
+        element = ElementWithTraits('an element').add_trait(lambda: released.wait(10), 'hangs', time_limit=5)
+        ##
+        start_time = time.time()
+        assert_that(calling(element.wait_until_loaded).with_args(timeout=0.2, polling_time=0.01),
+                    raises(TimeoutException, "conditions <hangs> not true"))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+        released.set()
+
+
+class CountingCondition(object):
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    def __call__(self):
+        result = self.results[min(self.calls, len(self.results) - 1)]
+        self.calls += 1
+        return result
+
+
+class ElementWithAdaptiveOrder(ElementWithTraits):
+    def __init__(self):
+        ElementWithTraits.__init__(self, 'element with adaptive order')
+        self.with_adaptive_trait_order()
+        self.add_trait(lambda: time.sleep(0.01) or True, 'logo present')
+        self.add_trait(lambda: time.sleep(0.01) or False, 'results loaded')
+
+
+def raise_exception():
+    raise NoSuchElementException()
+
 
 def get_element_with_traits_and_lazy_evaluation(value):
         an_element = ElementWithTraits('an element')
@@ -0,0 +1,173 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import unittest
+
+from hamcrest import equal_to, assert_that, contains_string, has_entry, greater_than, is_not, has_key, calling, \
+    raises
+from selenium.webdriver.common.by import By
+
+from pages.exceptions import CommandBudgetExceededException
+from pages.instrumentation import trace, command_budget, UNATTRIBUTED
+from pages.page import Page
+from pages.standard_components.textinput import TextInput
+from test.utils.mocks import MockedWebDriver
+
+
+class TracingDriverTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = MockedWebDriver()
+        self.driver.set_dom_element([By.ID, 'query'])
+        self.tracing_driver = trace(self.driver)
+
+    def tearDown(self):
+        self.tracing_driver.stop()
+
+    def test_attributes_commands_to_components_and_page_methods(self):
+        ##
+        SearchPage(self.driver).search('London')
+        ##
+        callers = [(record.component, record.method, record.page_method) for record in self.tracing_driver.records]
+        assert_that(callers, equal_to([('query', 'input_text', 'search page.search')] * 3),
+                    "locating the input should be attributed to input_text")
+        assert_that(self.tracing_driver.round_trips_by_page_method(), has_entry('search page.search', 3))
+
+    def test_records_payload_sizes_and_latency(self):
+        ##
+        SearchPage(self.driver).search('London')
+        ##
+        record = self.tracing_driver.records[-1]
+        assert_that(record.request_size, greater_than(len('London')))
+        assert_that(record.latency, greater_than(0))
+
+    def test_commands_of_test_code_are_unattributed(self):
+        ##
+        self.driver.find_element(By.ID, 'query')
+        ##
+        assert_that(self.tracing_driver.records[0].caller, equal_to(UNATTRIBUTED))
+
+    def test_report_lists_top_offenders(self):
+        SearchPage(self.driver).search('London')
+        ##
+        report = self.tracing_driver.report()
+        ##
+        assert_that(self.tracing_driver.top_offenders()[0][:2], equal_to(('query.input_text', 3)))
+        assert_that(report, contains_string('3 commands'))
+        assert_that(report, contains_string('query.input_text'))
+
+    def test_listeners_are_notified_of_commands(self):
+        commands = []
+        self.tracing_driver.add_listener(lambda record: commands.append(record.command))
+        ##
+        SearchPage(self.driver).search('London')
+        ##
+        assert_that(len(commands), equal_to(3))
+
+    def test_trace_returns_the_tracing_driver_of_a_driver(self):
+        assert_that(trace(self.driver), equal_to(self.tracing_driver))
+
+    def test_stop_restores_driver(self):
+        self.tracing_driver.stop()
+        ##
+        self.driver.find_element(By.ID, 'query')
+        ##
+        assert_that(self.driver.__dict__, is_not(has_key('execute')))
+        assert_that(len(self.tracing_driver.records), equal_to(0))
+        self.tracing_driver = trace(self.driver)
+
+
+class CommandBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = MockedWebDriver()
+        self.driver.set_dom_element([By.ID, 'query'])
+
+    def tearDown(self):
+        trace(self.driver).stop()
+
+    def test_block_within_budget(self):
+        with command_budget(max_commands=3, max_seconds=10, driver=self.driver) as budget:
+            SearchPage(self.driver).search('London')
+        assert_that(len(budget.records), equal_to(3))
+
+    def test_raises_exception_listing_commands_when_budget_is_exceeded(self):
+        def search():
+            with command_budget(max_commands=2, driver=self.driver):
+                SearchPage(self.driver).search('London')
+
+        assert_that(calling(search), raises(CommandBudgetExceededException,
+                                            "block exceeded its budget: 3 commands \\(budget 2\\)\n"
+                                            "  findElement by query.input_text"))
+
+    def test_decorated_methods_have_budget(self):
+        assert_that(calling(SearchPage(self.driver).search_within_budget).with_args('London'),
+                    raises(CommandBudgetExceededException, "search_within_budget exceeded its budget"))
+
+    def test_can_only_warn_when_budget_is_exceeded(self):
+        with command_budget(max_commands=1, warn=True, driver=self.driver) as budget:
+            SearchPage(self.driver).search('London')
+        assert_that(budget.exceeded(), equal_to(['3 commands (budget 1)']))
+
+    def test_nested_budgets_count_commands_of_inner_blocks(self):
+        with command_budget(driver=self.driver) as outer:
+            with command_budget(max_commands=5):
+                SearchPage(self.driver).search('London')
+        assert_that(len(outer.records), equal_to(3))
+
+    def test_driver_is_traced_only_while_budgets_are_active(self):
+        with command_budget(driver=self.driver):
+            with command_budget(driver=self.driver):
+                SearchPage(self.driver).search('London')
+            traced_records = self.driver._pages_tracing_driver.records
+            SearchPage(self.driver).search('London')
+        ##
+        assert_that(self.driver.__dict__, is_not(has_key('execute')), "driver should be restored")
+        assert_that(traced_records, equal_to([]), "commands should be kept by budgets only")
+
+    def test_budgets_count_commands_sent_from_other_threads(self):
+        page = SearchPage(self.driver)
+        page.add_trait(lambda: page.query.is_present(), 'has query', time_limit=1)
+
+        def wait_within_budget():
+            with command_budget(max_commands=0, driver=self.driver):
+                page.wait_until_loaded(timeout=1)
+
+        assert_that(calling(wait_within_budget), raises(CommandBudgetExceededException,
+                                                        "block exceeded its budget: 1 commands \\(budget 0\\)"))
+
+    def test_driver_traced_before_budget_stays_traced(self):
+        tracing_driver = trace(self.driver)
+        with command_budget(driver=self.driver):
+            SearchPage(self.driver).search('London')
+        ##
+        SearchPage(self.driver).search('London')
+        ##
+        assert_that(len(tracing_driver.records), equal_to(6))
+
+
+class SearchPage(Page):
+    def __init__(self, driver):
+        Page.__init__(self, driver, 'search page')
+        self.query = TextInput(driver, 'query', [By.ID, 'query'])
+
+    def load(self):
+        return self
+
+    def search(self, text):
+        self.query.input_text(text)
+        return self
+
+    @command_budget(max_commands=1)
+    def search_within_budget(self, text):
+        return self.search(text)
@@ -0,0 +1,116 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import unittest
+
+from hamcrest import equal_to, assert_that, contains_string, is_not, none, calling, raises
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from pages.locator_statistics import enable_locator_statistics, disable_locator_statistics, \
+    get_locator_statistics, timed_lookup, LocatorStatistics, DOCUMENT, ELEMENT
+from pages.page import Page
+from pages.standard_components.table import Table
+from pages.ui_component import UIComponent
+from test.utils.mocks import MockedWebDriver
+
+
+class LocatorStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = MockedWebDriver()
+        self.statistics = enable_locator_statistics()
+
+    def tearDown(self):
+        disable_locator_statistics()
+
+    def test_records_lookups_of_components_from_document(self):
+        self.driver.set_dom_element([By.ID, 'query'])
+        ##
+        UIComponent(self.driver, 'query', [By.ID, 'query']).no_cache().locate()
+        UIComponent(self.driver, 'query', [By.ID, 'query']).no_cache().locate()
+        ##
+        timing = self.statistics.slowest()[0]
+        assert_that((timing.by, timing.value, timing.scope, timing.count), equal_to((By.ID, 'query', DOCUMENT, 2)))
+
+    def test_records_lookups_of_table_items_from_table(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_dom_element([By.XPATH, './/tr'], parent_id=[By.ID, 'table'], children=2)
+        ##
+        Table(self.driver, 'table', [By.XPATH, './/tr'], UIComponent, 'item', [By.ID, 'table']).get_items()
+        ##
+        scopes = sorted((timing.value, timing.scope) for timing in self.statistics.timings())
+        assert_that(scopes, equal_to([('.//tr', ELEMENT), ('table', DOCUMENT)]))
+
+    def test_records_lookups_of_pages_and_components_finding_no_element_as_missed(self):
+        self.driver.set_dom_element([By.ID, 'query'])
+        ##
+        ATestPage(self.driver).has_element_with_locator([By.XPATH, '//div[@id="results"]'])
+        UIComponent(self.driver, 'query', [By.ID, 'query']).has_element([By.CSS_SELECTOR, '.suggestion'])
+        ##
+        misses = sorted((timing.value, timing.scope, timing.misses) for timing in self.statistics.timings()
+                        if timing.misses > 0)
+        assert_that(misses, equal_to([('.suggestion', ELEMENT, 1), ('//div[@id="results"]', DOCUMENT, 1)]))
+
+    def test_records_failed_lookups_as_missed(self):
+        def find_element(by, value):
+            raise NoSuchElementException(value)
+
+        ##
+        assert_that(calling(timed_lookup).with_args(find_element, [By.ID, 'missing'], DOCUMENT),
+                    raises(NoSuchElementException))
+        ##
+        assert_that(self.statistics.slowest()[0].misses, equal_to(1))
+
+    def test_report_marks_deep_xpaths_from_document(self):
+        statistics = LocatorStatistics()
+        statistics.record([By.XPATH, '//div//span'], DOCUMENT, 0.2)
+        statistics.record([By.XPATH, './/span'], ELEMENT, 0.1)
+        statistics.record([By.XPATH, './/span'], ELEMENT, 0.3, found=False)
+        statistics.record([By.XPATH, '(//td)[1]'], ELEMENT, 0.05)
+        ##
+        report = statistics.report()
+        ##
+        assert_that(report, contains_string('4 lookups of 3 locators'))
+        lines = report.splitlines()
+        assert_that(lines[3], contains_string('xpath=.//span from element'))
+        assert_that(lines[3], is_not(contains_string('XPath')))
+        assert_that(lines[4], contains_string('xpath=//div//span from document  (deep XPath from document root)'))
+        assert_that(lines[5], contains_string('xpath=(//td)[1] from element  (absolute XPath used from an element)'))
+
+    def test_flags_absolute_xpaths_of_table_items(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_dom_element([By.XPATH, '//tr'], parent_id=[By.ID, 'table'], children=2)
+        ##
+        Table(self.driver, 'table', [By.XPATH, '//tr'], UIComponent, 'item', [By.ID, 'table']).get_items()
+        ##
+        flagged = [(timing.value, timing.warning) for timing in self.statistics.timings() if timing.deep_xpath]
+        assert_that(flagged, equal_to([('//tr', 'absolute XPath used from an element')]))
+
+    def test_nothing_is_recorded_when_disabled(self):
+        disable_locator_statistics()
+        self.driver.set_dom_element([By.ID, 'query'])
+        ##
+        UIComponent(self.driver, 'query', [By.ID, 'query']).locate()
+        ##
+        assert_that(get_locator_statistics(), none())
+        assert_that(self.statistics.timings(), equal_to([]))
+
+
+class ATestPage(Page):
+    def load(self):
+        return self  # pragma: no cover
+
+    def __init__(self, driver):
+        Page.__init__(self, driver, 'test page')
@@ -0,0 +1,139 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from hamcrest import equal_to, assert_that, calling, raises, contains_string, greater_than, has_key, is_not
+from selenium.common.exceptions import TimeoutException
+
+from pages.element_with_traits import ElementWithTraits
+from pages.wait.metrics import MetricsSink, JSONLinesSink, PrometheusTextFileSink, add_sink, remove_sink
+from pages.wait.wait import Wait
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.sink = add_sink(CollectingSink())
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        remove_sink(self.sink)
+        shutil.rmtree(self.directory)
+
+    def test_metrics_sinks_define_emit(self):
+        assert_that(calling(MetricsSink), raises(TypeError))
+
+    def test_metrics_of_wait_for_traits(self):
+        conditions = iter([False, False, True])
+        element = ElementWithTraits('results page')
+        element.add_trait(lambda: True, 'has header')
+        element.add_trait(lambda: next(conditions), 'has results')
+        ##
+        Wait(1, 0.01).until_traits_are_present(element)
+        ##
+        metrics = self.sink.metrics[0]
+        assert_that(metrics.kind, equal_to('traits'))
+        assert_that(metrics.name, equal_to('results page'))
+        assert_that(metrics.outcome, equal_to('success'))
+        assert_that(metrics.polls, equal_to(3))
+        assert_that(metrics.sleep_time, greater_than(0))
+        assert_that(metrics.traits_first_true['has header'], equal_to(min(metrics.traits_first_true.values())))
+        assert_that(metrics.traits_first_true['has results'], greater_than(metrics.traits_first_true['has header']))
+
+    def test_metrics_of_timed_out_wait(self):
+        assert_that(calling(Wait(0.05, 0.01).until_condition).with_args(lambda: False, 'never true'),
+                    raises(TimeoutException))
+        assert_that(self.sink.metrics[0].outcome, equal_to('timeout'))
+
+    def test_nested_waits_record_their_own_traits(self):
+        inner = ElementWithTraits('inner').add_trait(lambda: True, 'inner trait')
+        outer = ElementWithTraits('outer').add_trait(lambda: Wait(1).until_traits_are_present(inner), 'inner loaded')
+        ##
+        Wait(1).until_traits_are_present(outer)
+        ##
+        inner_metrics, outer_metrics = self.sink.metrics
+        assert_that(inner_metrics.traits_first_true, has_key('inner trait'))
+        assert_that(outer_metrics.traits_first_true, is_not(has_key('inner trait')))
+
+    def test_json_lines_sink(self):
+        path = os.path.join(self.directory, 'waits.jsonl')
+        sink = add_sink(JSONLinesSink(path))
+        try:
+            Wait(1).until_condition(lambda: True, 'always true')
+            Wait(1).until_condition(lambda: True, 'always true')
+        finally:
+            remove_sink(sink)
+        with open(path) as jsonl_file:
+            lines = [json.loads(line) for line in jsonl_file]
+        assert_that(len(lines), equal_to(2))
+        assert_that(lines[0]['name'], equal_to('always true'))
+        assert_that(lines[0]['polls'], equal_to(1))
+
+    def test_prometheus_text_file_sink(self):
+        path = os.path.join(self.directory, 'pages.prom')
+        sink = add_sink(PrometheusTextFileSink(path))
+        try:
+            Wait(1).until_traits_are_present(ElementWithTraits('login "page"').add_trait(lambda: True, 'has logo'))
+        finally:
+            remove_sink(sink)
+        with open(path) as text_file:
+            text = text_file.read()
+        assert_that(text, contains_string('# TYPE pages_waits_total counter\n'
+                                          'pages_waits_total{kind="traits",name="login \\"page\\"",outcome="success"} '
+                                          '1.0\n'))
+        assert_that(text, contains_string('pages_wait_polls_total{kind="traits",name="login \\"page\\""} 1.0\n'))
+        assert_that(text, contains_string('pages_trait_first_true_waits_total{name="login \\"page\\"",'
+                                          'trait="has logo"} 1.0\n'))
+
+    def test_prometheus_text_file_sink_with_non_ascii_names(self):
+        path = os.path.join(self.directory, 'pages.prom')
+        sink = add_sink(PrometheusTextFileSink(path))
+        try:
+            Wait(1).until_traits_are_present(ElementWithTraits(u'P\xe1gina').add_trait(lambda: True, u'tiene logotipo'))
+            Wait(1).until_condition(lambda: True, 'always true')
+        finally:
+            remove_sink(sink)
+        with io.open(path, encoding='utf-8') as text_file:
+            text = text_file.read()
+        assert_that(text, contains_string(u'pages_waits_total{kind="traits",name="P\xe1gina",outcome="success"} 1.0\n'))
+        assert_that(text, contains_string(u'pages_waits_total{kind="condition",name="always true",outcome="success"}'))
+
+    def test_failing_sink_does_not_fail_wait(self):
+        sink = add_sink(FailingSink())
+        try:
+            ##
+            Wait(1).until_traits_are_present(ElementWithTraits(u'P\xe1gina').add_trait(lambda: True, 'has logo'))
+            ##
+        finally:
+            remove_sink(sink)
+        assert_that(self.sink.metrics[0].outcome, equal_to('success'))
+
+
+class CollectingSink(MetricsSink):
+    def __init__(self):
+        self.metrics = []
+
+    def emit(self, metrics):
+        self.metrics.append(metrics)
+
+
+class FailingSink(MetricsSink):
+    def emit(self, metrics):
+        raise ValueError(u'cannot emit {0}'.format(metrics.name))
@@ -1,10 +1,11 @@
 import unittest
 
-from hamcrest import assert_that, equal_to
+from hamcrest import assert_that, equal_to, contains_string
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.command import Command
 
 from pages.page import Page
+from pages.ui_component import UIComponent
 from test.utils.mocks import MockedWebDriver
 
 
@@ -29,6 +30,40 @@ class ElementWithTraitsTest(unittest.TestCase):
 
         assert_that(driver.has_fulfilled_expectations(), equal_to(True), "page should check if it element is present")
 
+    def test_locate_all_resolves_components_with_one_script(self):
+        driver = MockedWebDriver()
+        driver.set_script_result([{'ELEMENT': 'first_id'}, {'ELEMENT': 'second_id'}])
+        first = UIComponent(driver, 'first', [By.ID, 'first'])
+        second = UIComponent(driver, 'second', [By.CSS_SELECTOR, '.second'])
+
+        ATestPage(driver).locate_all([first, second])
+
+        assert_that(len(driver.get_executed_scripts()), equal_to(1), "components should be located with one script")
+        assert_that(driver.get_executed_scripts()[0]['args'],
+                    equal_to([[[By.ID, 'first'], [By.CSS_SELECTOR, '.second']]]))
+        assert_that([first.locate().id, second.locate().id], equal_to(['first_id', 'second_id']))
+
+    def test_locate_all_leaves_untranslatable_and_missing_components_to_locate(self):
+        driver = MockedWebDriver()
+        driver.set_script_result([None])
+        missing = UIComponent(driver, 'missing', [By.ID, 'missing'])
+        link = UIComponent(driver, 'link', [By.LINK_TEXT, 'a link'])
+
+        ATestPage(driver).locate_all([missing, link])
+
+        assert_that(driver.get_executed_scripts()[0]['args'], equal_to([[[By.ID, 'missing']]]))
+        assert_that([missing._web_element, link._web_element], equal_to([None, None]))
+
+    def test_locate_all_looks_up_ids_and_names_without_walking_the_document(self):
+        driver = MockedWebDriver()
+        driver.set_script_result([None])
+
+        ATestPage(driver).locate_all([UIComponent(driver, 'query', [By.ID, 'query'])])
+
+        script = driver.get_executed_scripts()[0]['script']
+        assert_that(script, contains_string('document.getElementById(value)'))
+        assert_that(script, contains_string("querySelectorAll('[' + by + '=\"' + CSS.escape(value) + '\"]')"))
+
 
 class ATestPage(Page):
     def __init__(self, driver):
@@ -0,0 +1,56 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import unittest
+from itertools import islice
+
+from hamcrest import assert_that, equal_to, close_to, calling, raises
+
+from pages.wait.poll_strategies import PollStrategy, FixedPolling, BackoffPolling, AdaptivePolling
+
+
+class PollStrategiesTest(unittest.TestCase):
+    """
+    Unit test for poll strategies.
+    """
+
+    def test_poll_strategies_define_delays(self):
+        assert_that(calling(PollStrategy), raises(TypeError))
+
+    def test_fixed_polling(self):
+        assert_that(list(islice(FixedPolling(0.5).delays(), 3)), equal_to([0.5, 0.5, 0.5]))
+
+    def test_backoff_polling_grows_up_to_maximum(self):
+        delays = list(islice(BackoffPolling(0.1, 2, 0.5, jitter=0).delays(), 5))
+        assert_that(delays, equal_to([0.1, 0.2, 0.4, 0.5, 0.5]))
+
+    def test_backoff_polling_has_jitter(self):
+        for delay in islice(BackoffPolling(1, 1, 1, jitter=0.2).delays(), 20):
+            assert_that(delay, close_to(1, 0.2))
+
+    def test_adaptive_polling_backs_off_until_load_times_are_observed(self):
+        delays = list(islice(AdaptivePolling(0.1, 2, 1, jitter=0).delays(), 3))
+        assert_that(delays, equal_to([0.1, 0.2, 0.4]))
+
+    def test_adaptive_polling_anticipates_median_load_time(self):
+        strategy = AdaptivePolling(0.1, 2, 5, jitter=0)
+        for load_time in [2, 4, 3]:
+            strategy.record(load_time)
+        ##
+        delays = list(islice(strategy.delays(), 3))
+        ##
+        assert_that(strategy.expected_load_time(), equal_to(3))
+        assert_that(delays[0], close_to(2.4, 0.001))
+        assert_that(delays[1:], equal_to([0.3, 0.6]))
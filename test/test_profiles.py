@@ -0,0 +1,156 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from hamcrest import equal_to, assert_that, calling, raises, has_length, none, contains_string, is_not, has_item, \
+    ends_with
+from selenium.common.exceptions import TimeoutException
+
+from pages.element_with_traits import ElementWithTraits
+from pages.profiles import LoadProfiles, enable_load_profiles, disable_load_profiles, profile_key
+
+
+class LoadProfilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'profiles.json')
+
+    def tearDown(self):
+        disable_load_profiles()
+        shutil.rmtree(self.directory)
+
+    def test_records_times_to_ready_of_classes_and_traits(self):
+        profiles = enable_load_profiles(self.path)
+        ##
+        ResultsPage().wait_until_loaded()
+        ResultsPage().wait_until_loaded()
+        ##
+        key = profile_key(ResultsPage())
+        assert_that(key, equal_to('test.test_profiles.ResultsPage'))
+        assert_that(profiles.load_times(key), has_length(2))
+        assert_that(profiles.trait_times(key, 'has results'), has_length(2))
+        disable_load_profiles()
+        assert_that(LoadProfiles(self.path).load_times(key), has_length(2), "profiles should be saved")
+
+    def test_times_are_written_in_batches(self):
+        profiles = LoadProfiles(self.path, flush_every=3)
+        ##
+        profiles.record('a.Page', 0.1)
+        profiles.record('a.Page', 0.2)
+        written_before_batch = LoadProfiles(self.path).load_times('a.Page')
+        profiles.record('a.Page', 0.3)
+        ##
+        assert_that(written_before_batch, equal_to([]))
+        assert_that(LoadProfiles(self.path).load_times('a.Page'), equal_to([0.1, 0.2, 0.3]))
+
+    def test_does_not_record_failed_waits(self):
+        profiles = enable_load_profiles(self.path)
+        element = ResultsPage().add_trait(lambda: False, 'never true')
+        ##
+        assert_that(calling(element.wait_until_loaded).with_args(timeout=0.05), raises(TimeoutException))
+        ##
+        assert_that(profiles.load_times(profile_key(element)), has_length(0))
+
+    def test_timing_is_derived_from_percentiles(self):
+        profiles = LoadProfiles(self.path, minimum_samples=10, margin=2, minimum_timeout=1)
+        for time_to_ready in range(1, 11):
+            profiles.record('a.Page', time_to_ready / 10.0)
+        ##
+        assert_that(profiles.percentile('a.Page', 99), equal_to(1.0))
+        assert_that(profiles.soft_timeout('a.Page'), equal_to(2.0))
+        assert_that(profiles.polling_time('a.Page'), equal_to(0.125))
+        assert_that(profiles.soft_timeout('another.Page'), none())
+
+    def test_waits_with_timing_derived_from_profiles(self):
+        profiles = enable_load_profiles(self.path, minimum_samples=3, minimum_timeout=1)
+        for _ in range(3):
+            profiles.record(profile_key(ResultsPage()), 0.4)
+        page = ResultsPage()
+        ##
+        page.wait_until_loaded(timeout=25, polling_time=0.5)
+        ##
+        assert_that(page.timeout, equal_to(25), "timeout given should be kept")
+        assert_that(page.polling_time, equal_to(0.1))
+
+    def test_loads_over_soft_timeout_succeed_and_are_recorded(self):
+        profiles = enable_load_profiles(self.path, minimum_samples=3, minimum_timeout=0.1)
+        for _ in range(3):
+            profiles.record(profile_key(ResultsPage()), 0.01)
+        page = ResultsPage()
+        loaded_at = time.time() + 0.3
+        page.add_trait(lambda: time.time() > loaded_at, 'loaded slowly')
+        ##
+        with LogCapture('pages.profiles') as logs:
+            page.wait_until_loaded(timeout=5, polling_time=0.05)
+        ##
+        assert_that(profiles.load_times(profile_key(page)), has_length(4))
+        assert_that(logs, has_length(1))
+        assert_that(logs[0].getMessage(), contains_string('over its soft timeout of 0.100 seconds'))
+
+    def test_profiles_sharing_a_file_merge_their_times(self):
+        first = LoadProfiles(self.path, flush_every=1)
+        second = LoadProfiles(self.path, flush_every=1)
+        ##
+        first.record('a.Page', 0.1)
+        second.record('a.Page', 0.2)
+        first.record('a.Page', 0.3)
+        ##
+        assert_that(sorted(LoadProfiles(self.path).load_times('a.Page')), equal_to([0.1, 0.2, 0.3]))
+        assert_that(os.listdir(self.directory), is_not(has_item(ends_with('.tmp'))))
+
+    def test_file_which_cannot_be_read_is_not_overwritten(self):
+        with open(self.path, 'w') as profiles_file:
+            profiles_file.write('{"profiles": {"a.Page": ')
+        profiles = LoadProfiles(self.path, flush_every=1)
+        ##
+        with LogCapture('pages.profiles') as logs:
+            profiles.record('a.Page', 0.1)
+        ##
+        with open(self.path) as profiles_file:
+            assert_that(profiles_file.read(), equal_to('{"profiles": {"a.Page": '))
+        assert_that(logs[-1].getMessage(), contains_string('Not writing load profiles'))
+        assert_that(profiles.load_times('a.Page'), equal_to([0.1]))
+
+
+class LogCapture(logging.Handler):
+    """
+    Captures the records logged by a logger while in the block.
+    """
+    def __init__(self, name):
+        logging.Handler.__init__(self)
+        self.logger = logging.getLogger(name)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def __enter__(self):
+        self.logger.addHandler(self)
+        return self.records
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.logger.removeHandler(self)
+
+
+class ResultsPage(ElementWithTraits):
+    def __init__(self):
+        ElementWithTraits.__init__(self, 'results page')
+        self.add_trait(lambda: True, 'has results')
@@ -15,11 +15,12 @@
 ############################################################################
 import unittest
 
-from hamcrest import assert_that, equal_to, calling, raises
+from hamcrest import assert_that, equal_to, calling, raises, is_not, contains_string
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.command import Command
 
 from pages.element_with_language import ElementWithLanguage
+from pages.exceptions import IllegalStateException
 from pages.standard_components.table import Table
 from pages.ui_component import UIComponent
 from test.utils.mocks import MockedWebDriver
@@ -95,6 +96,181 @@ class TableTest(unittest.TestCase):
         assert_that(self.driver.has_fulfilled_expectations(), equal_to(True),
                     "exercising get_items should result in calling Command.GET_ELEMENT_TEXT a number of times.")
 
+    def test_get_rows_data_reads_table_with_one_script(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result([['first', 'second'], ['third', 'fourth']])
+        #
+        data = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .get_rows_data([By.XPATH, './td'], ['class'])
+        #
+        assert_that(data, equal_to([['first', 'second'], ['third', 'fourth']]))
+        script_args = self.driver.get_executed_scripts()[0]['args']
+        assert_that(script_args[0]['ELEMENT'], equal_to(self.driver.get_id_for_stored_element([By.ID, 'table'])),
+                    "the table element should be passed to the script")
+        assert_that(script_args[1:], equal_to([[By.XPATH, './/tr'], [By.XPATH, './td'], ['class']]))
+
+    def test_get_rows_data_falls_back_to_find_elements(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_dom_element([By.XPATH, './/tr'], parent_id=[By.ID, 'table'], children=1)
+        self.driver.set_dom_element([By.LINK_TEXT, 'cell'], parent_id=[By.XPATH, './/tr'], children=2,
+                                    return_values=[{'text': 'first'}, {'text': 'second'}])
+        #
+        data = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .get_rows_data([By.LINK_TEXT, 'cell'])
+        #
+        assert_that(data, equal_to([['first', 'second']]))
+        assert_that(len(self.driver.get_executed_scripts()), equal_to(0),
+                    "locators which cannot be translated should not be resolved in the browser")
+
+    def test_get_items_creates_items_only_when_accessed(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_dom_element([By.XPATH, './/tr'], parent_id=[By.ID, 'table'], children=3)
+        #
+        items = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table']).get_items()
+        #
+        assert_that(len(items), equal_to(3))
+        assert_that(len(items._items), equal_to(0), "no item should be created before being accessed")
+        assert_that(items[-1].name, equal_to('item #2'))
+        assert_that(items[-1], equal_to(items[2]), "items should be created once")
+        assert_that(len(items._items), equal_to(1), "only accessed items should be created")
+
+    def test_get_items_can_be_sliced(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_dom_element([By.XPATH, './/tr'], parent_id=[By.ID, 'table'], children=3)
+        #
+        items = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table']).get_items()
+        #
+        assert_that([item.name for item in items[1:]], equal_to(['item #1', 'item #2']))
+        assert_that([item.name for item in items[::-2]], equal_to(['item #2', 'item #0']))
+        assert_that(calling(items.__getitem__).with_args(3), raises(IndexError))
+
+    def test_iter_items_follows_pages_and_skips_rows_already_seen(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result([[{'ELEMENT': 'a'}, 'a'], [{'ELEMENT': 'b'}, 'b']])
+        self.driver.set_script_result([[{'ELEMENT': 'b'}, 'b'], [{'ELEMENT': 'c'}, 'c']])
+        self.driver.set_script_result([[{'ELEMENT': 'c'}, 'c']])
+        pages_requested = []
+        #
+        items = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .iter_items(next_page=lambda: pages_requested.append(True), page_size=2, timeout=0, polling_time=0.01)
+        #
+        assert_that([item.locate().id for item in items], equal_to(['a', 'b', 'c']))
+        assert_that(len(pages_requested), equal_to(2), "iteration should stop on a page shorter than page_size")
+
+    def test_iter_items_stops_when_scrolling_loads_no_new_rows(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result([[{'ELEMENT': 'a'}, 'a']])
+        self.driver.set_script_result(None)
+        self.driver.set_script_result([[{'ELEMENT': 'a'}, 'a']])
+        #
+        items = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .iter_items(scroll=True, timeout=0, polling_time=0.01)
+        #
+        assert_that([item.name for item in items], equal_to(['item #0']))
+        assert_that(self.driver.get_executed_scripts()[1]['args'][0]['ELEMENT'], equal_to('a'),
+                    "the last row should be scrolled into view")
+
+    def test_index_by_maps_column_text_to_row(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result(rows_snapshot(0))
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], [By.XPATH, './/th'])
+        #
+        index = table.index_by('Id')
+        #
+        assert_that(sorted(index.keys()), equal_to(['1', '2', '3']))
+        assert_that(index['2'].locate().id, equal_to('row2'))
+        assert_that(self.driver.get_executed_scripts()[0]['args'][1:],
+                    equal_to([[By.XPATH, './/tr'], [By.XPATH, './td'], [By.XPATH, './/th']]))
+
+    def test_find_row_reuses_index_until_table_changes(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result(rows_snapshot(0))
+        self.driver.set_script_result(0)
+        self.driver.set_script_result(1)
+        self.driver.set_script_result(rows_snapshot(1))
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], names=['Id', 'Status'])
+        #
+        first = table.find_row(Id='3', Status='Failed')
+        second = table.find_row(Id='1', Status='Failed')
+        third = table.find_row(Status='Passed')
+        #
+        assert_that(first.locate().id, equal_to('row3'))
+        assert_that(second, equal_to(None))
+        assert_that(third.locate().id, equal_to('row1'))
+        assert_that(len(self.driver.get_executed_scripts()), equal_to(4),
+                    "the table should be read again only after its content changed")
+
+    def test_table_version_is_kept_out_of_the_dom(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result(rows_snapshot(0))
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], names=['Id', 'Status'])
+        #
+        table.index_by('Id')
+        #
+        script = self.driver.get_executed_scripts()[0]['script']
+        assert_that(script, is_not(contains_string('setAttribute')), "the DOM of the application should be untouched")
+        assert_that(script, contains_string('__pagesVersion'))
+        assert_that(script, contains_string('.disconnect()'))
+
+    def test_find_row_needs_columns(self):
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])
+        assert_that(calling(table.find_row).with_args(Id='1'), raises(IllegalStateException))
+
+    def test_filter_rows_is_evaluated_in_the_browser(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result([[2, {'ELEMENT': 'row3'}]])
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], [By.XPATH, './/th'])
+        #
+        rows = table.filter_rows('Status', equals='Failed')
+        #
+        assert_that([(row.name, row.locate().id) for row in rows], equal_to([('item #2', 'row3')]))
+        assert_that(self.driver.get_executed_scripts()[0]['args'][4:], equal_to(['Status', 'equals', 'Failed', False]))
+
+    def test_filter_rows_passes_column_position_when_names_are_given(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result([[0, ['1', 'Passed']]])
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], names=['Id', 'Status'])
+        #
+        data = table.filter_rows('Status', regex='^Pass', as_data=True)
+        #
+        assert_that(data, equal_to([['1', 'Passed']]))
+        assert_that(self.driver.get_executed_scripts()[0]['args'][4:], equal_to([1, 'regex', '^Pass', True]))
+
+    def test_filter_rows_reports_unknown_columns(self):
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], names=['Id', 'Status'])
+        assert_that(calling(table.filter_rows).with_args('State', equals='Failed'),
+                    raises(ValueError, "table has no column 'State', columns are: \\['Id', 'Status'\\]"))
+
+    def test_filter_rows_in_the_browser_reports_unknown_columns(self):
+        self.driver.set_dom_element([By.ID, 'table'])
+        self.driver.set_script_result({'unknownColumn': ['Id', 'Status']})
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], [By.XPATH, './/th'])
+        assert_that(calling(table.filter_rows).with_args('State', equals='Failed'),
+                    raises(ValueError, "table has no column 'State', columns are: \\[u?'Id', u?'Status'\\]"))
+
+    def test_filter_rows_rejects_regex_syntax_javascript_and_python_do_not_share(self):
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], names=['Id', 'Status'])
+        for regex in ['(?P<state>Fail)', '(?<=Status: )Failed', '(?i)failed', 'Failed\\Z']:
+            assert_that(calling(table.filter_rows).with_args('Status', regex=regex), raises(ValueError, 'do not share'))
+
+    def test_filter_rows_needs_exactly_one_predicate(self):
+        table = Table(self.driver, 'table', [By.XPATH, './/tr'], Item, 'item', [By.ID, 'table'])\
+            .with_columns([By.XPATH, './td'], names=['Id', 'Status'])
+        assert_that(calling(table.filter_rows).with_args('Id', equals='1', contains='1'), raises(ValueError))
+
+
+def rows_snapshot(version):
+    return [version, ['Id', 'Status'], [{'ELEMENT': 'row1'}, {'ELEMENT': 'row2'}, {'ELEMENT': 'row3'}],
+            [['1', 'Passed'], ['2', 'Passed'], ['3', 'Failed']]]
+
 
 class Item(UIComponent):
     def __init__(self, driver, name):
@@ -0,0 +1,111 @@
+############################################################################
+# Copyright 2015 Skyscanner Ltd                                            #
+#                                                                          #
+# Licensed under the Apache License, Version 2.0 (the "License");          #
+# you may not use this file except in compliance with the License.         #
+# You may obtain a copy of the License at                                  #
+#                                                                          #
+#    http://www.apache.org/licenses/LICENSE-2.0                            #
+#                                                                          #
+# Unless required by applicable law or agreed to in writing, software      #
+# distributed under the License is distributed on an "AS IS" BASIS,        #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. #
+# See the License for the specific language governing permissions and      #
+# limitations under the License.                                           #
+############################################################################
+import json
+import os
+import tempfile
+import unittest
+
+from hamcrest import equal_to, assert_that, has_item, has_entries, has_key, greater_than_or_equal_to, is_not
+from selenium.webdriver.common.by import By
+
+from pages.instrumentation import trace
+from pages.page import Page
+from pages.standard_components.textinput import TextInput
+from pages.timeline import TimelineRecorder, span
+from test.utils.mocks import MockedWebDriver
+
+
+class TimelineRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = MockedWebDriver()
+        self.driver.set_dom_element([By.ID, 'query'])
+
+    def tearDown(self):
+        trace(self.driver).stop()
+
+    def test_records_loads_waits_polls_traits_and_commands(self):
+        ##
+        with TimelineRecorder(self.driver) as timeline:
+            SearchPage(self.driver).load().wait_until_loaded(1, 0.01)
+        ##
+        spans = [(event['cat'], event['name']) for event in timeline.events]
+        assert_that(spans, has_item(('load', 'search page.load')))
+        assert_that(spans, has_item(('wait', 'search page.wait_until_loaded')))
+        assert_that(spans, has_item(('poll', 'poll #1')))
+        assert_that(spans, has_item(('trait', 'query is loaded')))
+        assert_that(spans, has_item(('sleep', 'sleep')))
+        assert_that(spans, has_item(('command', 'findElement')))
+
+    def test_command_spans_are_attributed(self):
+        ##
+        with TimelineRecorder(self.driver) as timeline:
+            SearchPage(self.driver).search('London')
+        ##
+        commands = [event for event in timeline.events if event['cat'] == 'command']
+        assert_that(len(commands), equal_to(3))
+        assert_that(commands[0]['args'], has_entries({'caller': 'query.input_text',
+                                                      'page method': 'search page.search'}))
+
+    def test_spans_of_a_call_are_nested(self):
+        ##
+        with TimelineRecorder(self.driver) as timeline:
+            SearchPage(self.driver).wait_until_loaded(1, 0.01)
+        ##
+        wait = [event for event in timeline.events if event['cat'] == 'wait'][0]
+        trait = [event for event in timeline.events if event['cat'] == 'trait'][0]
+        assert_that(trait['ts'], greater_than_or_equal_to(wait['ts']))
+        assert_that(wait['ts'] + wait['dur'], greater_than_or_equal_to(trait['ts'] + trait['dur']))
+
+    def test_saves_chrome_trace_events(self):
+        path = os.path.join(tempfile.mkdtemp(), 'timeline.json')
+        with TimelineRecorder() as timeline:
+            with span('step', 'test', user='someone'):
+                pass
+        ##
+        timeline.save(path)
+        ##
+        with open(path) as trace_file:
+            events = json.load(trace_file)['traceEvents']
+        assert_that(events[0], has_entries({'name': 'step', 'cat': 'test', 'ph': 'X', 'args': {'user': 'someone'}}))
+        assert_that(events[0], has_key('dur'))
+
+    def test_nothing_is_recorded_when_stopped(self):
+        timeline = TimelineRecorder(self.driver).start()
+        timeline.stop()
+        ##
+        SearchPage(self.driver).load().wait_until_loaded(1, 0.01)
+        ##
+        assert_that(timeline.events, equal_to([]))
+        assert_that(self.driver.__dict__, is_not(has_key('execute')), "driver should be restored")
+
+
+class SearchPage(Page):
+    def __init__(self, driver):
+        Page.__init__(self, driver, 'search page')
+        self.query = TextInput(driver, 'query', [By.ID, 'query'])
+        self.evaluations = 0
+        self.add_trait(self._query_is_loaded, 'query is loaded')
+
+    def load(self):
+        return self
+
+    def search(self, text):
+        self.query.input_text(text)
+        return self
+
+    def _query_is_loaded(self):
+        self.evaluations += 1
+        return self.evaluations > 1 and self.query.locate() is not None
@@ -13,11 +13,14 @@
 # See the License for the specific language governing permissions and      #
 # limitations under the License.                                           #
 ############################################################################
+import threading
+import time
 import unittest
 
-from hamcrest import assert_that, calling, raises, ends_with
+from hamcrest import assert_that, calling, raises, ends_with, equal_to, less_than
 
-from pages.traits import Trait
+from pages.traits import Trait, TraitStatistics
+from pages.wait.deadline import within, current_deadline
 
 
 class TraitsTest(unittest.TestCase):
@@ -30,6 +33,85 @@ class TraitsTest(unittest.TestCase):
     def test_str(self):
         assert_that(a_trait().__str__(), ends_with('always present'))
 
+    def test_statistics_order_cheap_and_failing_traits_first(self):
+        statistics = TraitStatistics()
+        traits = [Trait(lambda: True, 'slow'), Trait(lambda: True, 'never evaluated'), Trait(lambda: True, 'cheap'),
+                  Trait(lambda: True, 'often failing')]
+        statistics.record('slow', 1.0, False)
+        statistics.record('cheap', 0.1, True)
+        statistics.record('often failing', 0.1, False)
+        ##
+        assert_that([trait.description for trait in statistics.order(traits)],
+                    equal_to(['never evaluated', 'often failing', 'cheap', 'slow']))
+        assert_that(statistics.get('slow'), equal_to({'evaluations': 1, 'failures': 1, 'mean_time': 1.0}))
+
+    def test_condition_within_time_limit(self):
+        trait = Trait(lambda: 'value', 'returns value', time_limit=1)
+        assert_that(trait.evaluate(), equal_to('value'))
+        assert_that(trait.exceeded_time_limit, equal_to(False))
+
+    def test_condition_exceeding_time_limit_is_not_true(self):
+        released = threading.Event()
+        calls = []
+        trait = Trait(lambda: calls.append(1) or released.wait(5), 'hangs', time_limit=0.05)
+        ##
+        start_time = time.time()
+        assert_that(trait.evaluate(), equal_to(False))
+        assert_that(trait.evaluate(), equal_to(False))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+        assert_that(trait.exceeded_time_limit, equal_to(True))
+        assert_that(len(calls), equal_to(1), "hung condition should not be run again")
+        released.set()
+        assert_that(trait.evaluate(), equal_to(True), "result of the call in progress should be returned")
+        assert_that(trait.exceeded_time_limit, equal_to(False))
+
+    def test_conditions_with_time_limit_run_within_current_deadline(self):
+        deadlines = []
+        trait = Trait(lambda: deadlines.append(current_deadline()) or True, 'records deadline', time_limit=1)
+        ##
+        with within(1) as deadline:
+            trait.evaluate()
+        ##
+        assert_that(deadlines, equal_to([deadline]))
+
+    def test_condition_with_time_limit_can_be_true_after_deadline(self):
+        trait = Trait(lambda: time.sleep(0.01) or True, 'takes 10 ms', time_limit=1)
+        ##
+        with within(0):
+            is_true = trait.evaluate()
+        ##
+        assert_that(is_true, equal_to(True))
+        assert_that(trait.exceeded_time_limit, equal_to(False))
+
+    def test_condition_cut_short_by_deadline_does_not_exceed_time_limit(self):
+        released = threading.Event()
+        trait = Trait(lambda: released.wait(5), 'hangs', time_limit=1)
+        ##
+        with within(0.05):
+            is_true = trait.evaluate()
+        ##
+        released.set()
+        assert_that(is_true, equal_to(False))
+        assert_that(trait.exceeded_time_limit, equal_to(False))
+
+    def test_call_cut_short_by_deadline_is_not_returned_to_next_wait(self):
+        released = threading.Event()
+        results = iter(['first wait', 'second wait'])
+        trait = Trait(lambda: released.wait(5) and next(results), 'returns result of wait', time_limit=1)
+        with within(0.05):
+            trait.evaluate()
+        released.set()
+        time.sleep(0.05)
+        ##
+        with within(1):
+            result = trait.evaluate()
+        ##
+        assert_that(result, equal_to('second wait'))
+
+    def test_exceptions_of_conditions_with_time_limit_are_raised(self):
+        assert_that(calling(Trait(a_malformed_trait, 'raises', time_limit=1).evaluate), raises(TypeError))
+
 
 def foo():
     pass
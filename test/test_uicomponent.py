@@ -21,7 +21,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.command import Command
 from selenium.webdriver.remote.webelement import WebElement
 
-from pages.ui_component import UIComponent
+from pages.ui_component import UIComponent, RelocatableWebElement
 from test.utils.mocks import MockedWebElement, MockedWebDriver
 
 
@@ -61,12 +61,63 @@ class UiComponentTest(unittest.TestCase):
         assert_that(element_first_time, equal_to(element_second_time),
                     "when cached web_element() should return always the same WebElement object")
 
-    def test_web_element_is_evaluated_every_time_without_caching(self):
+    def test_web_element_is_cached_by_default(self):
         component = UIComponent(self.driver, 'a component', [By.ID, 'theid'])
         self.driver.set_dom_element([By.ID, 'theid'])
         element_first_time = component.locate()
         ##
         self.driver.reset_dom_elements()
+        element_second_time = component.locate()
+        ##
+        assert_that(element_first_time, equal_to(element_second_time),
+                    "web_element() should be located only once by default")
+
+    def test_stale_web_element_is_located_again(self):
+        component = UIComponent(self.driver, 'a component', [By.ID, 'theid'])
+        self.driver.set_dom_element([By.ID, 'theid'])
+        component.locate()
+        self.driver.set_stale_element([By.ID, 'theid'])
+        self.driver.reset_dom_elements()
+        self.driver.set_dom_element([By.ID, 'theid'])
+        new_id = self.driver.get_id_for_stored_element([By.ID, 'theid'])
+        self.driver.set_expected_command(Command.CLICK_ELEMENT, {'sessionId': self.driver.session_id, 'id': new_id})
+        ##
+        component.click()
+        ##
+        assert_that(component.locate().id, equal_to(new_id), "stale element should be located again")
+        assert_that(self.driver.has_fulfilled_expectations(), equal_to(True),
+                    "action on stale element should be retried on the located element")
+
+    def test_relocatable_element_keeps_w3c_dialect(self):
+        web_element = WebElement(self.driver, 'an id', True)
+        ##
+        element = RelocatableWebElement(web_element, lambda: web_element)
+        ##
+        assert_that((element.parent, element.id, element._w3c), equal_to((self.driver, 'an id', True)))
+
+    def test_relocatable_element_wraps_elements_without_w3c_dialect(self):
+        def selenium4_init(element, parent, id_):
+            element._parent = parent
+            element._id = id_
+
+        web_element = MockedWebElement(self.driver, 'an id')
+        del web_element._w3c
+        original_init = WebElement.__init__
+        WebElement.__init__ = selenium4_init
+        try:
+            ##
+            element = RelocatableWebElement(web_element, lambda: web_element)
+            ##
+        finally:
+            WebElement.__init__ = original_init
+        assert_that((element.parent, element.id, hasattr(element, '_w3c')), equal_to((self.driver, 'an id', False)))
+
+    def test_web_element_is_evaluated_every_time_without_caching(self):
+        component = UIComponent(self.driver, 'a component', [By.ID, 'theid']).no_cache()
+        self.driver.set_dom_element([By.ID, 'theid'])
+        element_first_time = component.locate()
+        ##
+        self.driver.reset_dom_elements()
         self.driver.set_dom_element([By.ID, 'theid'])
         element_second_time = component.locate()
         ##
@@ -74,6 +125,7 @@ class UiComponentTest(unittest.TestCase):
                     "when cached web_element() should return always the same WebElement object")
 
     def test_component_is_found_when_has_all_traits(self):
+        self.driver.set_dom_element([By.ID, 'an_id'])
         component = UIComponent(self.driver, 'a_component', [By.ID, 'an_id'])
         ##
         component.add_trait(lambda: True, 'always true')
@@ -97,6 +149,25 @@ class UiComponentTest(unittest.TestCase):
         assert_that(self.driver.has_fulfilled_expectations(), equal_to(True),
                     "component should be able to locate element it is scope")
 
+    def test_is_not_present_once_cached_element_is_removed(self):
+        self.driver.set_dom_element([By.ID, 'spinner'])
+        component = UIComponent(self.driver, 'spinner', [By.ID, 'spinner'])
+        component.locate()
+        self.driver.reset_dom_elements()
+        ##
+        assert_that(component.is_present(), equal_to(False), "the DOM should be queried even if element is cached")
+        assert_that(component.is_found(), equal_to(False))
+
+    def test_is_present_replaces_cached_element(self):
+        self.driver.set_dom_element([By.ID, 'an_id'])
+        component = UIComponent(self.driver, 'a_component', [By.ID, 'an_id'])
+        component.locate()
+        self.driver.reset_dom_elements()
+        self.driver.set_dom_element([By.ID, 'an_id'])
+        ##
+        assert_that(component.is_present(), equal_to(True))
+        assert_that(component.locate().id, equal_to(self.driver.get_id_for_stored_element([By.ID, 'an_id'])))
+
     def test_component_can_be_clicked(self):
         self.driver.set_dom_element([By.ID, 'an_id'])
 
@@ -13,10 +13,16 @@
 # See the License for the specific language governing permissions and      #
 # limitations under the License.                                           #
 ############################################################################
+import threading
+import time
 import unittest
-from hamcrest import equal_to, assert_that, raises, calling
+from hamcrest import equal_to, assert_that, raises, calling, less_than
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
+from pages.element_with_traits import ElementWithTraits
+from pages.exceptions import IllegalStateException, FailureTraitException, WaitCancelledException
+from pages.wait.deadline import cancellable
+from pages.wait.poll_strategies import PollStrategy
 from pages.wait.wait import Wait, Repeat
 from test.utils.mocks import MockedWebDriver
 
@@ -59,6 +65,112 @@ class WaitTest(unittest.TestCase):
     def test_wait_until_raises_TimeoutException(self):
         assert_that(calling(Wait(0).until_condition).with_args(always_false, 'always false'), raises(TimeoutException))
 
+    def test_wait_sleeps_as_told_by_poll_strategy(self):
+        strategy = RecordingStrategy()
+        conditions = iter([False, False, True])
+        ##
+        Wait(1, poll_strategy=strategy).until_condition(lambda: next(conditions), 'true on third evaluation')
+        ##
+        assert_that(strategy.delays_taken, equal_to(2))
+        assert_that(len(strategy.load_times), equal_to(1), 'load time should be recorded on success')
+
+    def test_poll_strategy_can_be_set(self):
+        strategy = RecordingStrategy()
+        wait = Wait(1).with_poll_strategy(strategy)
+        assert_that(wait._poll_strategy, equal_to(strategy))
+
+    def test_condition_is_evaluated_when_timeout_expires(self):
+        loaded_at = time.time() + 0.05
+        assert_that(Wait(0.1, 10).until_condition(lambda: time.time() > loaded_at, 'loaded'), equal_to(True))
+
+    def test_nested_waits_do_not_run_past_outer_wait(self):
+        def inner_wait():
+            return Wait(5, 0.01).until_condition(always_false, 'never true')
+        ##
+        start_time = time.time()
+        assert_that(calling(Wait(0.1, 0.01).until_condition).with_args(inner_wait, 'inner wait'),
+                    raises(TimeoutException, "condition <never true> was not true"))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+
+    def test_wait_stops_when_cancelled(self):
+        token = threading.Event()
+        threading.Timer(0.1, token.set).start()
+        ##
+        start_time = time.time()
+        assert_that(calling(Wait(30, 10).with_cancellation(token).until_condition).with_args(always_false, 'never'),
+                    raises(WaitCancelledException, "wait for <never> was cancelled"))
+        ##
+        assert_that(time.time() - start_time, less_than(1))
+
+    def test_waits_in_cancellable_block_are_cancelled(self):
+        token = threading.Event()
+        token.set()
+        element = element_loaded_on_evaluation('results', 100)
+        with cancellable(token):
+            assert_that(calling(Wait(30).until_traits_are_present).with_args(element),
+                        raises(WaitCancelledException))
+        assert_that(element.evaluations, equal_to(0))
+
+    def test_waits_until_all_elements_are_loaded_in_one_loop(self):
+        header = element_loaded_on_evaluation('header', 1)
+        results = element_loaded_on_evaluation('results', 3)
+        ##
+        Wait(1, 0.01).until_all_loaded(header, results)
+        ##
+        assert_that(header.evaluations, equal_to(1), "loaded elements should not be evaluated again")
+        assert_that(results.evaluations, equal_to(3))
+
+    def test_timeout_lists_elements_not_loaded(self):
+        header = element_loaded_on_evaluation('header', 1)
+        results = element_loaded_on_evaluation('results', 100)
+        sidebar = element_loaded_on_evaluation('sidebar', 100)
+
+        assert_that(calling(Wait(0.05, 0.01).until_all_loaded).with_args(header, results, sidebar),
+                    raises(TimeoutException, "elements not loaded after 0.05 seconds: "
+                                             "results <results loaded>, sidebar <sidebar loaded>"))
+
+    def test_until_all_loaded_stops_when_failure_trait_is_detected(self):
+        header = element_loaded_on_evaluation('header', 1)
+        results = element_loaded_on_evaluation('results', 100).add_failure_trait(lambda: True, 'error page')
+
+        assert_that(calling(Wait(5, 0.01).until_all_loaded).with_args(header, results),
+                    raises(FailureTraitException, "results failed to load: <error page>"))
+
+    def test_until_any_loaded_returns_first_loaded_element(self):
+        results = element_loaded_on_evaluation('results', 3)
+        no_results = element_loaded_on_evaluation('no results', 2)
+
+        assert_that(Wait(1, 0.01).until_any_loaded(results, no_results), equal_to(no_results))
+
+    def test_until_all_loaded_raises_exception_for_element_without_traits(self):
+        assert_that(calling(Wait(1).until_all_loaded).with_args(ElementWithTraits('no traits')),
+                    raises(IllegalStateException))
+
+
+def element_loaded_on_evaluation(name, evaluation):
+    element = ElementWithTraits(name)
+    element.evaluations = 0
+
+    def loaded():
+        element.evaluations += 1
+        return element.evaluations >= evaluation
+    return element.add_trait(loaded, name + ' loaded')
+
+
+class RecordingStrategy(PollStrategy):
+    def __init__(self):
+        self.delays_taken = 0
+        self.load_times = []
+
+    def delays(self):
+        while True:
+            self.delays_taken += 1
+            yield 0.01
+
+    def record(self, elapsed):
+        self.load_times.append(elapsed)
+
 
 class FirstException(Exception):
     pass
@@ -30,6 +30,9 @@ class MockedRemoteConnection(object):
         self.session_id = random.randint(1, 10000)
         self.element_prefix = u''
         self.dom_elements = []
+        self.stale_elements = []
+        self.script_results = []
+        self.executed_scripts = []
 
     def execute(self, command, params):
         for expected_command in self.expected_commands:
@@ -37,6 +40,22 @@ class MockedRemoteConnection(object):
                 for k, v in expected_command['params'].iteritems():
                     if k in params.keys() and v in params.values():
                         expected_command['fulfilled'] = True
+        if params.get('id') in self.stale_elements:
+            return {'status': 10, 'value': {'message': 'stale element reference'}, 'sessionId': self.session_id}
+        if command == Command.EXECUTE_SCRIPT or command == Command.EXECUTE_ASYNC_SCRIPT:
+            return {'success': 0, 'value': self.run_script(params), 'sessionId': self.session_id}
+        return self.respond(command, params)
+
+    def run_script(self, params):
+        self.executed_scripts.append(params)
+        if len(self.script_results) == 0:
+            return None
+        result = self.script_results.pop(0)
+        if hasattr(result, '__call__'):
+            return result(params['script'], params['args'])
+        return result
+
+    def respond(self, command, params):
         if command == Command.NEW_SESSION:
             return {'value': {}, 'sessionId': self.session_id}
 
@@ -52,6 +71,7 @@ class MockedRemoteConnection(object):
             for element in self.dom_elements:
                 if element['locator'][0] == params['using'] and element['locator'][1] == params['value']:
                     return {'success': 0, 'value': {'ELEMENT': element['value']}, 'sessionId': self.session_id}
+            return {'status': 7, 'value': {'message': 'no such element'}, 'sessionId': self.session_id}
 
         if command == Command.CLICK_ELEMENT:
             return {'sessionId': self.session_id, 'value': None, 'status': 0}
@@ -88,6 +108,12 @@ class MockedRemoteConnection(object):
     def reset_dom_elements(self):
         self.dom_elements = []
 
+    def set_script_result(self, result):
+        self.script_results.append(result)
+
+    def set_stale_element(self, value):
+        self.stale_elements.append(value)
+
     def get_element_value_from_locator(self, locator, position=1):
         return_elements = []
         for element in self.dom_elements:
@@ -151,6 +177,23 @@ class MockedWebDriver(WebDriver):
     def reset_dom_elements(self):
         self.command_executor.reset_dom_elements()
 
+    def set_script_result(self, result):
+        """
+        Queues the value returned by the next call to execute_script() or execute_async_script().
+        result can be a callable taking the script and its arguments.
+        WebElements should be returned as {'ELEMENT': <id>}.
+        """
+        self.command_executor.set_script_result(result)
+
+    def get_executed_scripts(self):
+        return self.command_executor.executed_scripts
+
+    def set_stale_element(self, locator, position=1):
+        """
+        Makes every further command on the stored element fail with StaleElementReferenceException.
+        """
+        self.command_executor.set_stale_element(self.get_id_for_stored_element(locator, position))
+
     def get_id_for_stored_element(self, locator, position=1):
         """
         :param position: 1-based position